@@ -3,6 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.core.exceptions import PermissionDenied
 from django.utils.translation import gettext_lazy as _
 from account.models import User
+from api.pagination import EstimatedCountPaginator
 
 
 @admin.register(User)
@@ -10,6 +11,8 @@ class UserAdmin(BaseUserAdmin):
     ordering = ['-created_at']
     list_display = ['email', 'full_name', 'is_active', 'is_verified', 'is_google_user']
     list_filter = ['is_active', 'is_staff', 'is_google_user', 'is_verified']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     readonly_fields = ('created_at', 'updated_at', 'last_login')
 
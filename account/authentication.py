@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through the cache.
+
+    Entries hold the user's column values except the password hash, plus the
+    fingerprint of that hash the revoke check compares; a hit rebuilds the user
+    with every field but ``password`` loaded, so permission checks and
+    serializers read it without queries. Entries live for AUTH_USER_CACHE_TIMEOUT
+    seconds and are dropped whenever the user is saved or deleted (see
+    account.signals), so steady-state authenticated requests make no user query.
+    """
+
+    def cached_fields(self):
+        return [field for field in self.user_model._meta.concrete_fields if field.attname != 'password']
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = _user_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            entry = {
+                'fields': {
+                    field.attname: field.get_prep_value(getattr(user, field.attname))
+                    for field in self.cached_fields()
+                },
+                'password': get_md5_hash_password(user.password),
+            }
+            cache.set(key, entry, timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        # The entry was stored for another token, so the per-token checks still apply.
+        fields = entry['fields']
+        if api_settings.CHECK_USER_IS_ACTIVE and not fields['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != entry['password']
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return self.user_model.from_db(router.db_for_read(self.user_model), list(fields), list(fields.values()))
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    target_class = CachedJWTAuthentication
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+
+def _blacklist_key(jti):
+    return f'jwt:blacklist:{jti}'
+
+
+def blacklist_jti(jti, exp):
+    """Revoke a token id until its ``exp`` timestamp; return False if it was already revoked."""
+    timeout = int(exp - time.time())
+    if timeout <= 0:
+        return True
+    return caches[settings.TOKEN_BLACKLIST_CACHE].add(_blacklist_key(jti), 1, timeout=timeout)
+
+
+def is_blacklisted(jti):
+    return caches[settings.TOKEN_BLACKLIST_CACHE].get(_blacklist_key(jti)) is not None
+
+
+class CacheBlacklistRefreshToken(RefreshToken):
+    """Refresh token whose blacklist lives in the cache rather than the token_blacklist tables.
+
+    Issuing a token writes nothing, and revoked ids expire from the cache
+    together with the token. Migration account 0005 copies the ids revoked
+    in the tables, so they stay revoked after switching.
+    """
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """Revoke the token; return False if another request revoked it first."""
+        return blacklist_jti(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which records an OutstandingToken row.
+        return super(BlacklistMixin, cls).for_user(user)
+
+
+def get_refresh_token_class():
+    return import_string(settings.REFRESH_TOKEN_CLASS)
@@ -0,0 +1,35 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import migrations
+from django.utils import timezone
+
+
+def copy_blacklisted_tokens(apps, schema_editor):
+    """Copy the unexpired entries of the token_blacklist tables into the cache blacklist.
+
+    Keeps tokens revoked before the switch to account.blacklist.CacheBlacklistRefreshToken
+    revoked. The key format is that of account.blacklist, frozen here.
+    """
+    BlacklistedToken = apps.get_model('token_blacklist', 'BlacklistedToken')
+    revoked = BlacklistedToken.objects.using(schema_editor.connection.alias).filter(
+        token__expires_at__gt=timezone.now()
+    ).values_list('token__jti', 'token__expires_at')
+    blacklist = caches[settings.TOKEN_BLACKLIST_CACHE]
+    for jti, expires_at in revoked.iterator(chunk_size=2000):
+        timeout = int(expires_at.timestamp() - time.time())
+        if timeout > 0:
+            blacklist.add(f'jwt:blacklist:{jti}', 1, timeout=timeout)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_address'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_blacklisted_tokens, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,134 @@
-from django.test import TestCase
+import time
+from importlib import import_module
 
-# Create your tests here.
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from store.tests import LOCMEM_CACHES
+from .authentication import CachedJWTAuthentication
+from .blacklist import CacheBlacklistRefreshToken, blacklist_jti, is_blacklisted
+
+User = get_user_model()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class UserAdminTests(TestCase):
+    def test_changelist_query_count_does_not_grow_with_the_page(self):
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password='Secret@123'))
+        url = reverse('admin:account_user_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        User.objects.bulk_create([User(email=f'user{index}@example.com') for index in range(10)])
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheBlacklistTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='token@example.com', password='Secret@123', is_verified=True)
+
+    def setUp(self):
+        caches[settings.TOKEN_BLACKLIST_CACHE].clear()
+
+    def refresh(self, token):
+        self.client.cookies[settings.SIMPLE_JWT['AUTH_COOKIE']] = str(token)
+        return self.client.post(reverse('token_refresh'))
+
+    def test_rotation_revokes_the_old_token_without_database_writes(self):
+        token = CacheBlacklistRefreshToken.for_user(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(query['sql'].startswith('INSERT') for query in queries))
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertTrue(is_blacklisted(token['jti']))
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.data['refresh_token']).status_code, 200)
+
+    def test_entries_expire_with_the_token(self):
+        self.assertTrue(blacklist_jti('expired', time.time() - 1))
+        self.assertFalse(is_blacklisted('expired'))
+        self.assertTrue(blacklist_jti('live', time.time() + 60))
+        self.assertFalse(blacklist_jti('live', time.time() + 60))
+        self.assertTrue(is_blacklisted('live'))
+
+    def test_migration_copies_unexpired_table_entries(self):
+        live, expired = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        live.blacklist()
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=timezone.now())
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+        migration = import_module('account.migrations.0005_copy_token_blacklist')
+        migration.copy_blacklisted_tokens(apps, connection.schema_editor())
+        self.assertTrue(is_blacklisted(live['jti']))
+        self.assertFalse(is_blacklisted(expired['jti']))
+        with self.assertRaises(TokenError):
+            CacheBlacklistRefreshToken(str(live))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CachedJWTAuthenticationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email='cached@example.com', password='Secret@123', full_name='Before')
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+
+    def me(self):
+        return self.client.get(reverse('me'))
+
+    def test_repeat_requests_make_no_user_queries(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.me().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.me().data['full_name'], 'Before')
+
+    def test_permission_checks_on_a_cache_hit_make_no_queries(self):
+        token = AccessToken.for_user(self.user)
+        CachedJWTAuthentication().get_user(token)
+        with self.assertNumQueries(0):
+            user = CachedJWTAuthentication().get_user(token)
+            request = APIRequestFactory().get('/')
+            request.user = user
+            self.assertFalse(IsAdminUser().has_permission(request, None))
+            self.assertEqual((user.email, user.is_superuser, user.is_verified), (self.user.email, False, False))
+        self.assertEqual(user.get_deferred_fields(), {'password'})
+
+    def test_entries_hold_no_password_hash(self):
+        self.me()
+        entry = cache.get(f'auth:user:{self.user.pk}')
+        self.assertNotIn('password', entry['fields'])
+        self.assertNotEqual(entry['password'], self.user.password)
+
+    def test_saving_the_user_invalidates_the_entry(self):
+        self.me()
+        self.user.full_name = 'After'
+        self.user.save()
+        self.assertEqual(self.me().data['full_name'], 'After')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_deleted_users_are_rejected(self):
+        self.me()
+        self.user.delete()
+        self.assertEqual(self.me().status_code, 401)
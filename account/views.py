@@ -9,17 +9,18 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.exceptions import TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from account.blacklist import get_refresh_token_class
 from account.serializers import SignupSerializer, LoginSerializer, MeSerializer, ForgotPasswordSerializer
 from api.tasks import send_email_confirmation_mail
+from cart.guest import merge_guest_cart
 from api.tokens import generate_token, verify_token
 
 User = get_user_model()
 
 
 def build_token_response(user, detail_message):
-    refresh = RefreshToken.for_user(user)
+    refresh = get_refresh_token_class().for_user(user)
     access = refresh.access_token
     data = {
         'access_token': str(access),
@@ -76,7 +77,8 @@ class LoginView(APIView):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        return build_token_response(user, 'Account has been verified successfully. You can continue your journey')
+        response = build_token_response(user, 'Account has been verified successfully. You can continue your journey')
+        return merge_guest_cart(request, user, response)
 
 
 @method_decorator(csrf_protect, name='dispatch')
@@ -90,11 +92,13 @@ class RefreshView(APIView):
             return Response({"detail": "You are not authorized to make this request."},
                             status=status.HTTP_401_UNAUTHORIZED)
         try:
-            refresh = RefreshToken(refresh_token)
+            refresh = get_refresh_token_class()(refresh_token)
             if settings.SIMPLE_JWT.get('ROTATE_REFRESH_TOKENS', False):
                 if settings.SIMPLE_JWT.get('BLACKLIST_AFTER_ROTATION', False):
                     try:
-                        refresh.blacklist()
+                        # False means a concurrent request already rotated this token.
+                        if refresh.blacklist() is False:
+                            raise TokenError('Token is blacklisted')
                     except AttributeError:
                         pass
                 user_id = refresh.payload.get('user_id')
@@ -132,7 +136,8 @@ class VerifyEmailView(APIView):
             return Response({"detail": "Account is already verified."}, status=status.HTTP_200_OK)
         user.is_verified = True
         user.save()
-        return build_token_response(user, 'Account has been verified successfully. You can continue your journey')
+        response = build_token_response(user, 'Account has been verified successfully. You can continue your journey')
+        return merge_guest_cart(request, user, response)
 
 
 class MeView(APIView):
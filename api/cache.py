@@ -0,0 +1,148 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+CATALOG_CACHE_NAMESPACE = 'catalog'
+LOCATIONS_CACHE_NAMESPACE = 'locations'
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def _modified_key(namespace):
+    return f'{namespace}:modified'
+
+
+def get_cache_version(namespace):
+    """Current version counter for a cache namespace.
+
+    A missing counter is seeded from the clock rather than 1 so entries written
+    under an evicted counter can never be served again.
+    """
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    """Invalidate every entry of a namespace in O(1) by moving its counter forward."""
+    try:
+        version = cache.incr(_version_key(namespace))
+    except ValueError:
+        version = get_cache_version(namespace)
+    cache.set(_modified_key(namespace), time.time(), timeout=None)
+    return version
+
+
+def get_last_modified(namespace):
+    """Unix time of the last change to a namespace.
+
+    When unknown it is assumed to be the start of the previous second, which
+    is earlier than any later bump can record.
+    """
+    key = _modified_key(namespace)
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, int(time.time()) - 1, timeout=None)
+        modified = cache.get(key)
+    return modified
+
+
+def get_last_modified_header(namespace):
+    """Whole-second ``Last-Modified`` of a namespace, or None while its last change is under a second old.
+
+    ``Last-Modified`` and ``If-Modified-Since`` have one-second resolution, so a
+    response sent in the same second as a change could carry the value of a
+    second change in that second too and be answered 304 after it; until the
+    second has passed only the ETag validates.
+    """
+    modified = get_last_modified(namespace)
+    if time.time() - modified < 1:
+        return None
+    return int(modified)
+
+
+def normalize_query_params(query_params, names, case_insensitive=()):
+    params = []
+    for name in names:
+        for value in query_params.getlist(name):
+            value = value.strip()
+            if name in case_insensitive:
+                value = value.lower()
+            if value:
+                params.append((name, value))
+    return sorted(params)
+
+
+class CachedResponseMixin:
+    """Serve read-only, user-independent responses from the versioned cache.
+
+    Responses carry a strong ``ETag`` derived from the versioned cache key and a
+    ``Last-Modified`` of the namespace's last bump, so conditional requests are
+    answered with a 304 before any database work or serialization.
+    """
+    cache_namespace = CATALOG_CACHE_NAMESPACE
+    cache_query_params = (
+        'page_number', 'page_size', 'pagination', 'cursor', 'category', 'search', 'fields', 'omit', 'expand',
+    )
+    # Only params the filters compare case-insensitively; category slugs match exactly.
+    cache_case_insensitive_params = ('search',)
+
+    def get_response_cache_key(self, request):
+        params = normalize_query_params(
+            request.query_params, self.cache_query_params, self.cache_case_insensitive_params
+        )
+        raw = f'{request.build_absolute_uri(request.path)}?{urlencode(params)}'
+        digest = hashlib.md5(raw.encode()).hexdigest()
+        version = get_cache_version(self.cache_namespace)
+        return f'{self.cache_namespace}:{version}:response:{digest}'
+
+    def get_etag(self, request, cache_key):
+        # The same data renders differently per format, so each one gets its own tag.
+        raw = f'{cache_key}:{request.accepted_renderer.format}'
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        etag = self.get_etag(request, key)
+        last_modified = get_last_modified_header(self.cache_namespace)
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.set_validators(not_modified, etag, last_modified)
+
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return self.set_validators(response, etag, last_modified)
+
+        response = handler(request, *args, **kwargs)
+        response['X-Cache'] = 'MISS'
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        cache.set(key, response.data, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        return self.set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
@@ -0,0 +1,169 @@
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+FIELDSET_QUERY_PARAMS = ('fields', 'omit', 'expand')
+
+# Each member is a tree of requested field paths, e.g. ``product.category.slug``
+# becomes {'product': {'category': {'slug': {}}}}. ``fields`` is None when every
+# field is wanted.
+Fieldset = namedtuple('Fieldset', ['fields', 'omit', 'expand'])
+FULL_FIELDSET = Fieldset(None, {}, {})
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter(name='fields', type=str, required=False,
+                     description="Comma-separated fields to return; dotted paths select nested fields, "
+                                 "e.g. 'id,name,category.slug'"),
+    OpenApiParameter(name='omit', type=str, required=False,
+                     description="Comma-separated fields to leave out, e.g. 'description,images'"),
+    OpenApiParameter(name='expand', type=str, required=False,
+                     description="Comma-separated optional fields to include, e.g. 'product.images' on cart items"),
+]
+
+
+def parse_field_paths(value):
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in path.split('.'):
+            name = name.strip()
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def has_fieldset(request):
+    return request is not None and any(request.GET.get(param) for param in FIELDSET_QUERY_PARAMS)
+
+
+def fieldset_from_request(request):
+    if not has_fieldset(request):
+        return FULL_FIELDSET
+    params = request.GET
+    fields = parse_field_paths(params['fields']) if params.get('fields') else None
+    return Fieldset(fields, parse_field_paths(params.get('omit', '')), parse_field_paths(params.get('expand', '')))
+
+
+def nested_fieldset(fieldset, name):
+    fields = fieldset.fields.get(name) or None if fieldset.fields is not None else None
+    return Fieldset(fields, fieldset.omit.get(name, {}), fieldset.expand.get(name, {}))
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin honouring ``?fields=``, ``?omit=`` and ``?expand=``.
+
+    Each takes a comma-separated list of fields; dotted paths reach into nested
+    serializers that use the mixin too. Fields listed in ``Meta.expandable_fields``
+    are left out unless expanded (or named in ``fields``). The top-level
+    serializer reads the request; nested ones are handed their part of it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.fieldset = kwargs.pop('fieldset', None)
+        super().__init__(*args, **kwargs)
+
+    def get_fieldset(self):
+        if self.fieldset is None:
+            is_root = self.parent is None or (
+                isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None
+            )
+            self.fieldset = fieldset_from_request(self.context.get('request')) if is_root else FULL_FIELDSET
+        return self.fieldset
+
+    def get_fields(self):
+        fieldset = self.get_fieldset()
+        expandable = getattr(self.Meta, 'expandable_fields', ())
+        selected = {}
+        for name, field in super().get_fields().items():
+            if fieldset.fields is not None and name not in fieldset.fields:
+                continue
+            if name in fieldset.omit and not fieldset.omit[name]:
+                continue
+            if name in expandable and name not in fieldset.expand and fieldset.fields is None:
+                continue
+            nested = getattr(field, 'child', field)
+            if isinstance(nested, SparseFieldsetMixin):
+                nested.fieldset = nested_fieldset(fieldset, name)
+            selected[name] = field
+        return selected
+
+
+def plan_queryset(serializer, model):
+    """Columns, ``select_related`` paths and prefetches needed to render ``serializer``.
+
+    Columns are None when some field reads something other than model fields
+    (e.g. a property) that ``Meta.source_fields`` does not map, in which case
+    the model is loaded whole. Fields may also declare ``source_fields``.
+    """
+    meta_sources = getattr(getattr(serializer, 'Meta', None), 'source_fields', {})
+    columns, select, prefetch = {model._meta.pk.name}, [], []
+    for name, field in serializer.fields.items():
+        sources = getattr(field, 'source_fields', None) or meta_sources.get(name)
+        if sources:
+            columns.update(sources)
+            continue
+        try:
+            if len(field.source_attrs) != 1:
+                raise FieldDoesNotExist
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            columns = None
+            break
+        nested = getattr(field, 'child', field)
+        if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            columns.add(model_field.name)
+            select.append(model_field.name)
+            if isinstance(nested, serializers.Serializer):
+                sub_columns, sub_select, sub_prefetch = plan_queryset(nested, model_field.related_model)
+                if sub_columns is not None:
+                    columns.update(f'{model_field.name}__{column}' for column in sub_columns)
+                select += [f'{model_field.name}__{path}' for path in sub_select]
+                prefetch += [
+                    Prefetch(f'{model_field.name}__{lookup.prefetch_through}', lookup.queryset)
+                    for lookup in sub_prefetch
+                ]
+        elif model_field.one_to_many or model_field.many_to_many:
+            queryset = model_field.related_model._default_manager.all()
+            if isinstance(nested, serializers.Serializer):
+                extra = (model_field.field.name,) if model_field.one_to_many else ()
+                queryset = trim_queryset(queryset, nested, extra)
+            accessor = model_field.name if model_field.concrete else model_field.get_accessor_name()
+            prefetch.append(Prefetch(accessor, queryset))
+        elif not model_field.concrete:
+            columns = None
+            break
+        else:
+            columns.add(model_field.name)
+    return columns, select, prefetch
+
+
+def trim_queryset(queryset, serializer, required_fields=()):
+    """Limit ``queryset`` to the columns and relations ``serializer`` renders."""
+    serializer = getattr(serializer, 'child', serializer)
+    columns, select, prefetch = plan_queryset(serializer, queryset.model)
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if columns is not None:
+        queryset = queryset.only(*columns, *required_fields)
+    return queryset
+
+
+class SparseFieldsetViewMixin:
+    """Trim the view's querysets to the fields a ``?fields=``/``?omit=``/``?expand=`` request renders.
+
+    ``fieldset_required_fields`` lists columns the view itself reads, e.g. the
+    cursor pagination ordering.
+    """
+    fieldset_required_fields = ()
+
+    def trim_to_fieldset(self, queryset, always=False):
+        if not always and not has_fieldset(self.request):
+            return queryset
+        serializer = self.serializer_class(context=self.get_serializer_context())
+        return trim_queryset(queryset, serializer, self.fieldset_required_fields)
@@ -1,11 +1,33 @@
 import django_filters
+from rest_framework.filters import SearchFilter
 
 from store.models import Product
+from store.search import get_search_backend
 
 
-class ProductCategoryFilter(django_filters.FilterSet):
+class ProductFilter(django_filters.FilterSet):
     category = django_filters.CharFilter(field_name='category__slug', lookup_expr='exact')
+    min_price = django_filters.NumberFilter(field_name='unit_price', lookup_expr='gte')
+    max_price = django_filters.NumberFilter(field_name='unit_price', lookup_expr='lte')
+    min_rating = django_filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    in_stock = django_filters.BooleanFilter(method='filter_in_stock')
 
     class Meta:
         model = Product
-        fields = ['category']
\ No newline at end of file
+        fields = [
+            'category', 'min_price', 'max_price', 'min_rating', 'in_stock', 'is_featured', 'is_flash_sale',
+            'is_product_of_the_day', 'is_best_seller', 'is_attractive_offer',
+        ]
+
+    def filter_in_stock(self, queryset, name, value):
+        return queryset.filter(stock__gt=0) if value else queryset.filter(stock=0)
+
+
+class ProductSearchFilter(SearchFilter):
+    """Delegate ``?search=`` to the configured full-text backend, ordered by relevance."""
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, ' '.join(terms))
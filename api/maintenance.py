@@ -0,0 +1,27 @@
+import time
+from collections import Counter
+
+from django.db import transaction
+
+
+def delete_in_batches(queryset, batch_size, pause=0):
+    """Delete the rows of ``queryset`` in short transactions of at most ``batch_size`` rows.
+
+    Batches walk the primary key, and each one deletes a closed pk range with the
+    queryset's filter applied again, so rows that stopped matching in the
+    meantime are kept. ``pause`` seconds between batches leave room for other
+    writers. Returns the number of rows deleted per model, cascades included.
+    """
+    deleted = Counter()
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        remaining = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(remaining.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic():
+            deleted.update(remaining.filter(pk__lte=pks[-1]).delete()[1])
+        last_pk = pks[-1]
+        if pause:
+            time.sleep(pause)
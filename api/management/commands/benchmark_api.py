@@ -0,0 +1,245 @@
+import http.client
+import json
+import math
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api.management.commands.seed_data import SEED_EMAIL_DOMAIN
+
+SCENARIOS = ('catalog', 'cart', 'login')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, wall_time):
+    latencies = sorted(sample['latency'] for sample in samples)
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    statuses = defaultdict(int)
+    for sample in samples:
+        statuses[str(sample['status'])] += 1
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if not 200 <= sample['status'] < 300),
+        'requests_per_second': round(len(samples) / wall_time, 2) if wall_time else None,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            'p95': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            'p99': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        },
+        'sql_queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'status_codes': dict(statuses),
+    }
+
+
+class ApiClient:
+    """One keep-alive connection per worker thread."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+
+        started = time.perf_counter()
+        try:
+            connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self.local.connection = None
+            return {'status': 0, 'latency': time.perf_counter() - started, 'queries': None}, None
+        sample = {
+            'status': response.status,
+            'latency': time.perf_counter() - started,
+            'queries': int(response.headers['X-SQL-Queries']) if response.headers.get('X-SQL-Queries') else None,
+        }
+        try:
+            data = json.loads(payload) if payload else None
+        except ValueError:
+            data = None
+        return sample, data
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test a running API server and report requests/sec, p50/p95/p99 latency and SQL queries '
+        'per request as JSON. Run the server with QUERY_COUNT_HEADER=True and API_THROTTLING=False '
+        'against a database filled by seed_data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--users', type=int, default=8, help='Seeded users shared by the cart workers.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed that seed_data generated the users with.')
+        parser.add_argument('--password', default='Seed@1234')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Baseline JSON file from an earlier run to diff against.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1 or options['users'] < 1:
+            raise CommandError('--concurrency, --requests and --users must be positive.')
+        self.options = options
+        self.client = ApiClient(options['base_url'], options['timeout'])
+
+        products = self.discover_products()
+        results = {}
+        for scenario in options['scenarios']:
+            self.stdout.write(f'Running {scenario} scenario...')
+            results[scenario] = getattr(self, f'run_{scenario}')(products)
+
+        report = {'meta': self.metadata(), 'results': results}
+        rendered = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(rendered + '\n')
+        self.stdout.write(rendered)
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'base_url': self.options['base_url'],
+            'concurrency': self.options['concurrency'],
+            'requests_per_endpoint': self.options['requests'],
+        }
+
+    def discover_products(self):
+        sample, data = self.client.request('GET', '/api/products/?' + urlencode({'page_size': 20}))
+        if sample['status'] != 200 or not data or not data.get('results'):
+            raise CommandError(f'Could not list products from {self.options["base_url"]}; is the database seeded?')
+        return data['results']
+
+    def run_load(self, name, operation, total):
+        """Call ``operation(worker, iteration)`` ``total`` times spread over ``--concurrency`` workers."""
+        workers = self.options['concurrency']
+        samples = []
+        lock = threading.Lock()
+
+        def worker(worker_index):
+            worker_samples = []
+            for iteration in range(worker_index, total, workers):
+                worker_samples.extend(operation(worker_index, iteration))
+            with lock:
+                samples.extend(worker_samples)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(worker, range(workers)))
+        wall_time = time.perf_counter() - started
+
+        by_endpoint = defaultdict(list)
+        for endpoint, sample in samples:
+            by_endpoint[endpoint].append(sample)
+        self.stdout.write(f'  {name}: {len(samples)} requests in {wall_time:.2f}s')
+        return {endpoint: summarize(endpoint_samples, wall_time) for endpoint, endpoint_samples in by_endpoint.items()}
+
+    def run_catalog(self, products):
+        slugs = [product['slug'] for product in products]
+        search_term = products[0]['name'].split()[0]
+        requests = [
+            ('GET /api/products/', lambda i: f'/api/products/?page_number={i % 5 + 1}'),
+            ('GET /api/products/?pagination=cursor', lambda i: '/api/products/?pagination=cursor'),
+            ('GET /api/products/?search=', lambda i: '/api/products/?' + urlencode({'search': search_term})),
+            ('GET /api/products/<slug>/', lambda i: f'/api/products/{slugs[i % len(slugs)]}/'),
+            ('GET /api/categories/', lambda i: '/api/categories/'),
+            ('GET /api/flash-sales/', lambda i: '/api/flash-sales/'),
+            ('GET /api/best-sellers/', lambda i: '/api/best-sellers/'),
+        ]
+
+        def operation(worker, iteration):
+            endpoint, path = requests[iteration % len(requests)]
+            sample, _ = self.client.request('GET', path(iteration))
+            return [(endpoint, sample)]
+
+        return self.run_load('catalog', operation, self.options['requests'] * len(requests))
+
+    def login(self, user_index):
+        email = f'user{user_index % self.options["users"]}.s{self.options["seed"]}@{SEED_EMAIL_DOMAIN}'
+        return self.client.request('POST', '/api/auth/login/', {'email': email, 'password': self.options['password']})
+
+    def run_login(self, products):
+        def operation(worker, iteration):
+            sample, _ = self.login(iteration)
+            return [('POST /api/auth/login/', sample)]
+
+        return self.run_load('login', operation, self.options['requests'])
+
+    def run_cart(self, products):
+        tokens = {}
+        for worker in range(self.options['concurrency']):
+            sample, data = self.login(worker)
+            if sample['status'] != 200:
+                raise CommandError(f'Cart workers could not log in (HTTP {sample["status"]}); run seed_data first.')
+            tokens[worker] = data['access_token']
+
+        def operation(worker, iteration):
+            token = tokens[worker]
+            product_id = products[iteration % len(products)]['id']
+            add, _ = self.client.request('POST', '/api/cart/add/', {'product': product_id, 'quantity': 1}, token)
+            listing, _ = self.client.request('GET', '/api/cart/', token=token)
+            remove, _ = self.client.request('POST', '/api/cart/remove/', {'product_id': product_id}, token)
+            return [('POST /api/cart/add/', add), ('GET /api/cart/', listing), ('POST /api/cart/remove/', remove)]
+
+        return self.run_load('cart', operation, self.options['requests'])
+
+    def compare(self, report, baseline_path):
+        with open(baseline_path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        self.stdout.write(f'\nCompared with {baseline_path} ({baseline["meta"].get("commit")}):')
+        for scenario, endpoints in report['results'].items():
+            for endpoint, current in endpoints.items():
+                previous = baseline['results'].get(scenario, {}).get(endpoint)
+                if not previous:
+                    continue
+                self.stdout.write(
+                    f'  {endpoint}: '
+                    f'{self.delta(previous["requests_per_second"], current["requests_per_second"])} req/s, '
+                    f'p95 {self.delta(previous["latency_ms"]["p95"], current["latency_ms"]["p95"])} ms, '
+                    f'queries {self.delta(previous["sql_queries_per_request"], current["sql_queries_per_request"])}'
+                )
+
+    @staticmethod
+    def delta(previous, current):
+        if previous is None or current is None:
+            return f'{previous} -> {current}'
+        change = (current - previous) / previous * 100 if previous else 0
+        return f'{previous} -> {current} ({change:+.1f}%)'
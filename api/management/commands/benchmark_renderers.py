@@ -0,0 +1,43 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import ORJSONRenderer
+from store.views import ProductViewSet
+
+RENDERERS = (('JSONRenderer', JSONRenderer), ('ORJSONRenderer', ORJSONRenderer))
+
+
+class Command(BaseCommand):
+    help = 'Compare render time and size of a full product list page with the stdlib and orjson renderers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--rounds', type=int, default=500)
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get('/api/products/', {'page_size': options['page_size']})
+        response = ProductViewSet.as_view({'get': 'list'})(request)
+        if response.status_code != 200 or not response.data['results']:
+            raise CommandError('No products to render; run seed_data first.')
+        data = response.data
+
+        outputs = {}
+        self.stdout.write(f'Product page of {len(data["results"])} items, median of {options["rounds"]} rounds:')
+        for name, renderer_class in RENDERERS:
+            renderer = renderer_class()
+            outputs[name] = renderer.render(data)
+            timings = []
+            for _ in range(options['rounds']):
+                started = time.perf_counter()
+                renderer.render(data)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(
+                f'  {name:<15} {statistics.median(timings) * 1e6:9.1f} us  {len(outputs[name]):8d} bytes'
+            )
+
+        if outputs['JSONRenderer'] != outputs['ORJSONRenderer']:
+            raise CommandError('ORJSONRenderer output differs from JSONRenderer.')
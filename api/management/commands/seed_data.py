@@ -0,0 +1,197 @@
+import io
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+from filer.models import Image
+from PIL import Image as PILImage
+
+from api.cache import CATALOG_CACHE_NAMESPACE, bump_cache_version
+from cart.models import Cart, CartItem
+from store.merchandising import random_promo_flags, refresh_collections
+from store.models import Category, Product, ProductImage
+
+User = get_user_model()
+
+CATEGORY_NAMES = [
+    'Lipsticks', 'Foundations', 'Mascaras', 'Eyeliners', 'Blushes', 'Concealers', 'Primers',
+    'Highlighters', 'Eyeshadows', 'Serums', 'Moisturisers', 'Cleansers', 'Sunscreens', 'Toners',
+    'Face Masks', 'Shampoos', 'Conditioners', 'Hair Oils', 'Perfumes', 'Nail Polishes',
+]
+ADJECTIVES = [
+    'Velvet', 'Matte', 'Glossy', 'Hydrating', 'Radiant', 'Silky', 'Ultra', 'Natural', 'Vivid',
+    'Soft', 'Bold', 'Pure', 'Luminous', 'Nourishing', 'Sheer', 'Classic', 'Rose', 'Golden',
+]
+WORDS = [
+    'long-lasting', 'lightweight', 'formula', 'with', 'vitamin', 'and', 'natural', 'extracts',
+    'for', 'all', 'skin', 'types', 'smooth', 'finish', 'dermatologically', 'tested', 'cruelty-free',
+]
+SEED_EMAIL_DOMAIN = 'seed.makeover.test'
+
+
+def seeded_uuid(seed, kind, index):
+    """Stable id for the ``index``-th generated row of ``kind``, independent of the requested scale."""
+    return uuid.UUID(int=random.Random(f'{seed}:{kind}:{index}').getrandbits(128), version=4)
+
+
+def batched(start, stop, size):
+    for batch_start in range(start, stop, size):
+        yield range(batch_start, min(batch_start + size, stop))
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic catalog (categories, products, images), users and carts '
+        'for load testing. Rows are keyed by --seed, so re-running is a no-op and raising a count '
+        'only adds the missing rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--categories', type=int, default=len(CATEGORY_NAMES))
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--images-per-product', type=int, default=2)
+        parser.add_argument('--image-pool', type=int, default=10,
+                            help='Distinct image files shared by every generated product.')
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--carts', type=int, default=50, help='Generated users that get a cart.')
+        parser.add_argument('--cart-items', type=int, default=3, help='Maximum lines per cart.')
+        parser.add_argument('--password', default='Seed@1234', help='Password of every generated user.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if options['categories'] < 1 and options['products']:
+            raise CommandError('Products need at least one category.')
+        if options['carts'] > options['users']:
+            raise CommandError('--carts cannot exceed --users.')
+        if options['cart_items'] and options['carts'] and not options['products']:
+            raise CommandError('Cart lines need at least one product.')
+
+        self.seed = options['seed']
+        self.batch_size = options['batch_size']
+        started = time.monotonic()
+
+        self.seed_categories(options['categories'])
+        image_ids = self.seed_image_pool(options['image_pool']) if options['images_per_product'] else []
+        self.seed_products(options['products'], options['categories'], image_ids, options['images_per_product'])
+        user_ids = self.seed_users(options['users'], options['password'])
+        self.seed_carts(user_ids[:options['carts']], options['products'], options['categories'], options['cart_items'])
+
+        bump_cache_version(CATALOG_CACHE_NAMESPACE)
+        refresh_collections()
+        self.stdout.write(self.style.SUCCESS(f'Seeding finished in {time.monotonic() - started:.1f}s.'))
+
+    def report(self, label, count, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'{label}: {count} rows in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} rows/s)')
+
+    def seed_categories(self, count):
+        started = time.monotonic()
+        categories = []
+        for index in range(count):
+            name = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+            if index >= len(CATEGORY_NAMES):
+                name = f'{name} {index // len(CATEGORY_NAMES) + 1}'
+            categories.append(Category(
+                id=seeded_uuid(self.seed, 'category', index), name=name,
+                slug=f'seed-{self.seed}-{slugify(name)}',
+            ))
+        Category.objects.bulk_create(categories, batch_size=self.batch_size, ignore_conflicts=True)
+        self.report('Categories', count, started)
+
+    def seed_image_pool(self, count):
+        ids = []
+        for index in range(count):
+            filename = f'seed-{self.seed}-{index}.png'
+            image = Image.objects.filter(original_filename=filename).first()
+            if image is None:
+                rng = random.Random(f'{self.seed}:image:{index}')
+                buffer = io.BytesIO()
+                color = tuple(rng.randrange(256) for _ in range(3))
+                PILImage.new('RGB', (600, 600), color).save(buffer, format='PNG')
+                upload = SimpleUploadedFile(filename, buffer.getvalue(), content_type='image/png')
+                image = Image.objects.create(original_filename=filename, file=upload)
+            ids.append(image.pk)
+        return ids
+
+    def build_product(self, index, category_count):
+        rng = random.Random(f'{self.seed}:product:{index}')
+        category_index = rng.randrange(category_count)
+        name = f'{rng.choice(ADJECTIVES)} {CATEGORY_NAMES[category_index % len(CATEGORY_NAMES)]} {index:07d}'
+        return Product(
+            id=seeded_uuid(self.seed, 'product', index),
+            category_id=seeded_uuid(self.seed, 'category', category_index),
+            name=name,
+            slug=f'{slugify(name)}-s{self.seed}',
+            description=' '.join(rng.choices(WORDS, k=rng.randint(12, 60))).capitalize() + '.',
+            unit_price=Decimal(rng.randint(199, 99999)) / 100,
+            stock=rng.randint(0, 500),
+            rating=round(rng.uniform(1, 5), 1),
+            **random_promo_flags(rng),
+        )
+
+    def seed_products(self, count, category_count, image_ids, images_per_product):
+        started = time.monotonic()
+        for indexes in batched(0, count, self.batch_size):
+            products = [self.build_product(index, category_count) for index in indexes]
+            Product.objects.bulk_create(products, ignore_conflicts=True)
+            if image_ids:
+                images = []
+                for index, product in zip(indexes, products):
+                    rng = random.Random(f'{self.seed}:product-images:{index}')
+                    for position in range(images_per_product):
+                        images.append(ProductImage(
+                            id=seeded_uuid(self.seed, f'product-image-{position}', index),
+                            product_id=product.id, image_id=rng.choice(image_ids),
+                        ))
+                ProductImage.objects.bulk_create(images, ignore_conflicts=True)
+            self.stdout.write(f'  products {indexes.stop}/{count}')
+        self.report('Products', count, started)
+
+    def seed_users(self, count, password):
+        started = time.monotonic()
+        password_hash = make_password(password)
+        user_ids = []
+        for indexes in batched(0, count, self.batch_size):
+            emails = [f'user{index}.s{self.seed}@{SEED_EMAIL_DOMAIN}' for index in indexes]
+            User.objects.bulk_create([
+                User(email=email, full_name=f'Seed User {index}', password=password_hash, is_verified=True)
+                for index, email in zip(indexes, emails)
+            ], ignore_conflicts=True)
+            ids = dict(User.objects.filter(email__in=emails).values_list('email', 'id'))
+            user_ids += [ids[email] for email in emails]
+        self.report('Users', count, started)
+        return user_ids
+
+    def seed_carts(self, user_ids, product_count, category_count, max_items):
+        started = time.monotonic()
+        for offset in range(0, len(user_ids), self.batch_size):
+            batch_user_ids = user_ids[offset:offset + self.batch_size]
+            Cart.objects.bulk_create([
+                Cart(id=seeded_uuid(self.seed, 'cart', index), user_id=user_id)
+                for index, user_id in enumerate(batch_user_ids, start=offset)
+            ], ignore_conflicts=True)
+            if not max_items:
+                continue
+
+            # Users may already own a cart created through the API, so look the ids up.
+            cart_ids = dict(Cart.objects.filter(user_id__in=batch_user_ids).values_list('user_id', 'id'))
+            items = []
+            for index, user_id in enumerate(batch_user_ids, start=offset):
+                rng = random.Random(f'{self.seed}:cart:{index}')
+                product_indexes = rng.sample(range(product_count), min(rng.randint(1, max_items), product_count))
+                for product_index in product_indexes:
+                    product = self.build_product(product_index, category_count)
+                    items.append(CartItem(
+                        id=seeded_uuid(self.seed, f'cart-item-{product_index}', index),
+                        cart_id=cart_ids[user_id], product_id=product.id,
+                        unit_price=product.unit_price, quantity=rng.randint(1, 3),
+                    ))
+            CartItem.objects.bulk_create(items, ignore_conflicts=True)
+        self.report('Carts', len(user_ids), started)
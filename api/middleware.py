@@ -0,0 +1,24 @@
+from django.db import connection
+
+
+class QueryCountMiddleware:
+    """Report the number of SQL queries a request ran in the ``X-SQL-Queries`` header.
+
+    Enabled with ``QUERY_COUNT_HEADER=True``; meant for benchmarks, not production.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        response['X-SQL-Queries'] = str(queries)
+        return response
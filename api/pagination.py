@@ -1,4 +1,8 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework.pagination import PageNumberPagination, CursorPagination
 
 
 class ProductResultsPagination(PageNumberPagination):
@@ -6,4 +10,80 @@ class ProductResultsPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 20
 
-    page_query_param = 'page_number'
\ No newline at end of file
+    page_query_param = 'page_number'
+
+
+class ProductCursorPagination(CursorPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 20
+
+    ordering = ('-created_at', '-id')
+
+
+CURSOR_PAGINATION_PARAMETERS = [
+    OpenApiParameter(name='pagination', type=str, enum=['page', 'cursor'], required=False,
+                     description="Pagination mode. 'cursor' skips the total count and pages by keyset."),
+    OpenApiParameter(name='cursor', type=str, required=False,
+                     description="Opaque cursor taken from the 'next'/'previous' links in cursor mode"),
+]
+
+
+class SelectablePaginationMixin:
+    """Pick page-number or cursor pagination per request, falling back to the view default.
+
+    Sending a cursor always selects cursor mode, so the 'next' links keep working.
+    """
+    cursor_pagination_class = ProductCursorPagination
+    pagination_mode_query_param = 'pagination'
+    default_pagination_mode = 'page'
+
+    def get_pagination_mode(self):
+        request = getattr(self, 'request', None)
+        if request is None:
+            return self.default_pagination_mode
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            return 'cursor'
+        mode = request.query_params.get(self.pagination_mode_query_param, self.default_pagination_mode)
+        return mode if mode in ('page', 'cursor') else self.default_pagination_mode
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.get_pagination_mode() == 'cursor':
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+def estimate_row_count(model, using='default'):
+    """Planner estimate of the rows in ``model``'s table, or None where the database has none."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 until the table is first vacuumed or analyzed.
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Admin paginator that skips ``COUNT(*)`` on large unfiltered tables.
+
+    Above ``estimate_threshold`` rows the page links use the planner estimate;
+    filtered or smaller changelists keep the exact count.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return Paginator.count.func(self)
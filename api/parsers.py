@@ -0,0 +1,27 @@
+import codecs
+import io
+
+from django.conf import settings
+from rest_framework import parsers
+
+from .renderers import ORJSONRenderer, orjson
+
+
+class ORJSONParser(parsers.JSONParser):
+    """``JSONParser`` backed by orjson, falling back to the stdlib when orjson is missing.
+
+    Bodies orjson rejects are handed to ``JSONParser`` so errors are reported as
+    before. Integers beyond 64 bits parse as floats rather than ints.
+    """
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+        try:
+            return orjson.loads(body if codecs.lookup(encoding).name == 'utf-8' else body.decode(encoding))
+        except (orjson.JSONDecodeError, UnicodeDecodeError):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
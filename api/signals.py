@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import LOCATIONS_CACHE_NAMESPACE, bump_cache_version
+from .models import Area, City, Region
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+def bump_locations_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(LOCATIONS_CACHE_NAMESPACE))
@@ -1,6 +1,15 @@
+from collections import Counter
+from datetime import timedelta
+
 from celery import shared_task
 from django.core.mail import send_mail
 from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from cart.models import Cart
+from cart.storage import get_cart_storage
+from .maintenance import delete_in_batches
 
 
 @shared_task
@@ -13,3 +22,18 @@ def send_email_confirmation_mail(email, verification_link):
     else:
         print(f"Skipped sending email to: {email}")
 
+
+@shared_task
+def purge_stale_data():
+    """Delete carts idle for CART_RETENTION_DAYS and expired refresh tokens, in small batches.
+
+    Blacklist entries go with their outstanding token. Returns the rows deleted per model.
+    """
+    batch = {'batch_size': settings.PURGE_BATCH_SIZE, 'pause': settings.PURGE_BATCH_PAUSE}
+    # Pending hot-cart writes count as activity, so land them before judging staleness.
+    get_cart_storage().flush()
+    cutoff = timezone.now() - timedelta(days=settings.CART_RETENTION_DAYS)
+    deleted = Counter()
+    deleted.update(delete_in_batches(Cart.objects.stale(cutoff), **batch))
+    deleted.update(delete_in_batches(OutstandingToken.objects.filter(expires_at__lt=timezone.now()), **batch))
+    return dict(deleted)
@@ -0,0 +1,118 @@
+import datetime
+import io
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from cart.models import Cart, CartItem
+from store.tests import CatalogTestCase
+from .maintenance import delete_in_batches
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from .tasks import purge_stale_data
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def assertRendersLikeJSONRenderer(self, data, accepted_media_type=None):
+        self.assertEqual(
+            ORJSONRenderer().render(data, accepted_media_type),
+            JSONRenderer().render(data, accepted_media_type),
+        )
+
+    def test_output_matches_the_stdlib_renderer(self):
+        self.assertRendersLikeJSONRenderer({
+            'id': uuid.uuid4(),
+            'unit_price': Decimal('12.50'),
+            'created_at': datetime.datetime(2024, 5, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2024, 5, 1, 9, 30),
+            'date': datetime.date(2024, 5, 1),
+            'time': datetime.time(9, 30, 15, 500000),
+            'duration': datetime.timedelta(minutes=5),
+            'label': gettext_lazy('Products'),
+            'description': 'Línea nueva — 漢字',
+            'counts': {1: 'one'},
+            'nested': [{'rating': 4.5, 'flags': (True, None)}],
+        })
+
+    def test_indented_and_oversized_values_fall_back(self):
+        self.assertRendersLikeJSONRenderer({'a': [1, 2]}, 'application/json; indent=4')
+        self.assertRendersLikeJSONRenderer({'big': 2 ** 70})
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+
+class ORJSONParserTests(SimpleTestCase):
+    def parse(self, body, parser_class=ORJSONParser, **context):
+        return parser_class().parse(io.BytesIO(body), parser_context=context)
+
+    def test_parses_like_the_stdlib_parser(self):
+        for body in ('{"name": "Lipstick ✨", "quantity": 2, "price": 1.5}'.encode(), b'[1, {"nested": [null, true, "x"]}]'):
+            self.assertEqual(self.parse(body), self.parse(body, JSONParser))
+        self.assertEqual(self.parse('{"a": "é"}'.encode('latin-1'), encoding='latin-1'), {'a': 'é'})
+
+    def test_invalid_bodies_raise_parse_errors(self):
+        for body in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
+
+
+class RendererBenchmarkCommandTests(CatalogTestCase):
+    def test_reports_both_renderers(self):
+        self.create_products(2, images=0)
+        stdout = io.StringIO()
+        call_command('benchmark_renderers', rounds=2, stdout=stdout)
+        self.assertIn('ORJSONRenderer', stdout.getvalue())
+
+
+@override_settings(CART_RETENTION_DAYS=30, PURGE_BATCH_SIZE=2, PURGE_BATCH_PAUSE=0)
+class PurgeStaleDataTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.product = cls.create_products(1, images=0)[0]
+        long_ago = timezone.now() - datetime.timedelta(days=31)
+        cls.carts = []
+        for index in range(5):
+            cart = Cart.objects.create(user=User.objects.create_user(email=f'idle{index}@example.com', password='x'))
+            CartItem.objects.create(cart=cart, product=cls.product, unit_price='1.00')
+            cls.carts.append(cart)
+        Cart.objects.update(updated_at=long_ago)
+        CartItem.objects.update(updated_at=long_ago)
+        # A cart whose row is old but whose line changed recently is still in use.
+        CartItem.objects.filter(cart=cls.carts[0]).update(updated_at=timezone.now())
+
+        user = User.objects.create_user(email='tokens@example.com', password='x')
+        for index, expires_at in enumerate([long_ago, long_ago, timezone.now() + datetime.timedelta(days=1)]):
+            token = OutstandingToken.objects.create(
+                user=user, jti=f'jti-{index}', token=f'token-{index}', expires_at=expires_at
+            )
+            BlacklistedToken.objects.create(token=token)
+
+    def test_stale_carts_and_expired_tokens_are_purged(self):
+        self.assertEqual(purge_stale_data(), {
+            'cart.Cart': 4, 'cart.CartItem': 4,
+            'token_blacklist.OutstandingToken': 2, 'token_blacklist.BlacklistedToken': 2,
+        })
+        self.assertEqual(list(Cart.objects.values_list('pk', flat=True)), [self.carts[0].pk])
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['jti-2'])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+        self.assertEqual(purge_stale_data(), {})
+
+    def test_batches_are_bounded(self):
+        with CaptureQueriesContext(connection) as queries:
+            deleted = delete_in_batches(Cart.objects.stale(timezone.now() - datetime.timedelta(days=30)), 2)
+        self.assertEqual(deleted['cart.Cart'], 4)
+        deletes = [query['sql'] for query in queries if query['sql'].startswith('DELETE FROM "cart_cart"')]
+        self.assertEqual(len(deletes), 2)
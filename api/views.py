@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import status
+from api.cache import LOCATIONS_CACHE_NAMESPACE, CachedResponseMixin
 from api.models import Region, City, Area
 from api.serializers import SimpleRegionSerializer, SimpleCitySerializer, SimpleAreaSerializer
 
@@ -16,9 +17,12 @@ def csrf_failure(request, reason=""):
     }, status=403)
 
 
-class LocationsApiView(APIView):
+class LocationsApiView(CachedResponseMixin, APIView):
     http_method_names = ['get']
     permission_classes = [AllowAny]
+    cache_namespace = LOCATIONS_CACHE_NAMESPACE
+    cache_query_params = ('region', 'city')
+    cache_case_insensitive_params = ()
 
     @extend_schema(
         tags=['Locations'],
@@ -35,6 +39,9 @@ class LocationsApiView(APIView):
         }
     )
     def get(self, request, *args, **kwargs):
+        return self.cached_response(self.get_locations, request, *args, **kwargs)
+
+    def get_locations(self, request, *args, **kwargs):
         reg_id = request.query_params.get('region', None)
         city_id = request.query_params.get('city', None)
 
@@ -1,6 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 import environ
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -56,6 +57,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Benchmarks read per-request query counts from this header
+if env.bool('QUERY_COUNT_HEADER', default=False):
+    MIDDLEWARE.insert(0, 'api.middleware.QueryCountMiddleware')
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -92,6 +97,8 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            # A file rather than the default in-memory database, so threaded tests get real concurrent writers
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
@@ -144,9 +151,18 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly'
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_THROTTLE_CLASSES': [
         'api.throttles.BurstUserRateThrottle',
         'api.throttles.SustainedUserRateThrottle',
@@ -162,6 +178,9 @@ REST_FRAMEWORK = {
         'login_attempts': '10/minute',
     },
 }
+# Load tests against a local server need throttling out of the way
+if not env.bool('API_THROTTLING', default=True):
+    REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
 
 # Auth User Model
 AUTH_USER_MODEL = 'account.User'
@@ -210,6 +229,13 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
+# Refresh token class (dotted path); account.blacklist.CacheBlacklistRefreshToken keeps revoked ids in
+# TOKEN_BLACKLIST_CACHE until they expire, rest_framework_simplejwt.tokens.RefreshToken uses the blacklist tables
+REFRESH_TOKEN_CLASS = env('REFRESH_TOKEN_CLASS', default='account.blacklist.CacheBlacklistRefreshToken')
+# Cache alias of the revoked ids; evicting one would make its token valid again, hence the 'state' alias
+TOKEN_BLACKLIST_CACHE = env('TOKEN_BLACKLIST_CACHE', default='state')
+# Seconds account.authentication.CachedJWTAuthentication keeps a resolved user; saves and deletes drop it early
+AUTH_USER_CACHE_TIMEOUT = env.int('AUTH_USER_CACHE_TIMEOUT', default=60)
 
 # CORS / Frontend
 FRONTEND_URL = env('FRONTEND_URL', default='http://localhost:3000')
@@ -253,11 +279,51 @@ CACHES = {
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
-    }
+    },
+    # Data that is not a copy of the database and must survive memory pressure. In production point
+    # REDIS_STATE_URL at a Redis running with appendonly yes and maxmemory-policy noeviction.
+    'state': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': env('REDIS_STATE_URL') if PRODUCTION else env('REDIS_STATE_URL', default=env('REDIS_CACHE_URL')),
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        },
+    },
 }
 
+CATALOG_CACHE_TIMEOUT = env.int('CATALOG_CACHE_TIMEOUT', default=60 * 15)
+
+# Product search backend (dotted path); defaults to the engine matching the database vendor
+PRODUCT_SEARCH_BACKEND = env('PRODUCT_SEARCH_BACKEND', default=None)
+
+# Cart storage (dotted path); cart.storage.RedisCartStorage keeps active carts in Redis
+# and writes them back to the database every CART_FLUSH_INTERVAL seconds
+CART_STORAGE_BACKEND = env('CART_STORAGE_BACKEND', default='cart.storage.DatabaseCartStorage')
+CART_STORAGE_CACHE = env('CART_STORAGE_CACHE', default='state')
+CART_FLUSH_INTERVAL = env.int('CART_FLUSH_INTERVAL', default=10)
+CART_FLUSH_BATCH_SIZE = env.int('CART_FLUSH_BATCH_SIZE', default=500)
+CART_HOT_TIMEOUT = env.int('CART_HOT_TIMEOUT', default=60 * 60)
+# Anonymous carts live in the default cache behind a signed cookie and merge into the user's cart at login
+GUEST_CART_COOKIE = 'guest_cart'
+GUEST_CART_TIMEOUT = env.int('GUEST_CART_TIMEOUT', default=60 * 60 * 24 * 7)
+
 # Celery Configuration
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default=env('REDIS_CACHE_URL'))
+CELERY_BEAT_SCHEDULE = {
+    'flush-hot-carts': {
+        'task': 'cart.tasks.flush_hot_carts',
+        'schedule': CART_FLUSH_INTERVAL,
+    },
+    'purge-stale-data': {
+        'task': 'api.tasks.purge_stale_data',
+        'schedule': crontab(hour=env.int('PURGE_HOUR', default=3), minute=0),
+    },
+}
+
+# Nightly purge of idle carts and expired refresh tokens, deleted in short batches
+CART_RETENTION_DAYS = env.int('CART_RETENTION_DAYS', default=90)
+PURGE_BATCH_SIZE = env.int('PURGE_BATCH_SIZE', default=1000)
+PURGE_BATCH_PAUSE = env.float('PURGE_BATCH_PAUSE', default=0.1)
 
 # Logging
 LOG_DIR = BASE_DIR / 'logs'
@@ -326,18 +392,21 @@ CORS_ALLOW_ALL_ORIGINS = True
 CSRF_TRUSTED_ORIGINS = ['http://*', 'https://*']
 
 # Filer Settings
-# THUMBNAIL_HIGH_RESOLUTION = True
-# THUMBNAIL_QUALITY = 85
-# THUMBNAIL_PROCESSORS = (
-# 	'easy_thumbnails.processors.colorspace',
-# 	'easy_thumbnails.processors.autocrop',
-# 	'filer.thumbnail_processors.scale_and_crop_with_subject_location',
-# 	'easy_thumbnails.processors.filters',
-# )
-# THUMBNAIL_ALIASES = {
-# 	'': {
-# 		'admin_thumb': {'size': (100, 100), 'crop': True},
-# 		'product_thumb': {'size': (400, 400), 'crop': True},
-# 		'featured_large': {'size': (800, 600), 'crop': True},
-# 	}
-# }
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_PROCESSORS = (
+	'easy_thumbnails.processors.colorspace',
+	'easy_thumbnails.processors.autocrop',
+	'filer.thumbnail_processors.scale_and_crop_with_subject_location',
+	'easy_thumbnails.processors.filters',
+)
+# Renditions are written as WebP, including sources with transparency
+THUMBNAIL_EXTENSION = 'webp'
+THUMBNAIL_TRANSPARENCY_EXTENSION = 'webp'
+THUMBNAIL_ALIASES = {
+	'': {
+		'admin_thumb': {'size': (100, 100), 'crop': True},
+		'list': {'size': (320, 320), 'crop': True},
+		'detail': {'size': (800, 800)},
+		'zoom': {'size': (1600, 1600)},
+	}
+}
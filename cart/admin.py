@@ -1,13 +1,39 @@
+from decimal import Decimal
+
 from django.contrib import admin
+from django.db.models import DecimalField, F, Sum
+
+from api.pagination import EstimatedCountPaginator
 from .models import Cart, CartItem
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'created_at', 'updated_at', 'total')
+    list_select_related = ('user',)
     readonly_fields = ('created_at', 'updated_at')
+    search_fields = ('user__email',)
+    autocomplete_fields = ('user',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            items_total=Sum(
+                F('items__unit_price') * F('items__quantity'),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+        )
+
+    @admin.display(ordering='items_total')
+    def total(self, obj):
+        return (obj.items_total or Decimal(0)).quantize(Decimal('0.01'))
 
 
 @admin.register(CartItem)
 class CartItemAdmin(admin.ModelAdmin):
     list_display = ('id', 'cart', 'product', 'unit_price', 'quantity', 'subtotal', 'created_at', 'updated_at')
+    list_select_related = ('cart__user', 'product')
     readonly_fields = ('created_at', 'updated_at')
+    autocomplete_fields = ('cart', 'product')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
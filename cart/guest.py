@@ -0,0 +1,53 @@
+import logging
+import uuid
+
+from django.conf import settings
+
+from .storage import CartBusy, GuestCartStorage, get_cart_storage
+
+logger = logging.getLogger(__name__)
+
+GUEST_CART_SALT = 'guest-cart'
+
+
+def get_guest_cart_id(request):
+    """Guest cart id from the signed cookie, or None when missing or tampered with."""
+    return request.get_signed_cookie(
+        settings.GUEST_CART_COOKIE, default=None, salt=GUEST_CART_SALT, max_age=settings.GUEST_CART_TIMEOUT
+    )
+
+
+def new_guest_cart_id():
+    return uuid.uuid4().hex
+
+
+def set_guest_cart_cookie(response, guest_id):
+    response.set_signed_cookie(
+        settings.GUEST_CART_COOKIE, guest_id, salt=GUEST_CART_SALT,
+        max_age=settings.GUEST_CART_TIMEOUT,
+        httponly=True,
+        samesite='Lax',
+        secure=settings.PRODUCTION,
+    )
+
+
+def get_request_cart(request):
+    """Storage and owner of the requester's cart: the user, or the guest id from the cookie (maybe None)."""
+    if request.user.is_authenticated:
+        return get_cart_storage(), request.user
+    return GuestCartStorage(), get_guest_cart_id(request)
+
+
+def merge_guest_cart(request, user, response):
+    """Move the requester's guest cart, if any, into ``user``'s cart and clear the cookie."""
+    guest_id = get_guest_cart_id(request)
+    if guest_id is None:
+        return response
+    try:
+        GuestCartStorage().merge(guest_id, user)
+    except CartBusy:
+        # Don't fail the sign-in; the cookie stays, so the next sign-in merges the cart.
+        logger.warning('Guest cart %s was busy; merge into user %s skipped', guest_id, user.pk)
+        return response
+    response.delete_cookie(settings.GUEST_CART_COOKIE, samesite='Lax')
+    return response
@@ -1,23 +1,118 @@
 import uuid
-from django.db import models
+from decimal import Decimal
+from django.db import connections, models, router
+from django.db.models import Count, DecimalField, Exists, F, OuterRef, Subquery, Sum
+from django.utils import timezone
 from account.models import User
 from store.models import Product
 
 
+class CartQuerySet(models.QuerySet):
+    def stale(self, cutoff):
+        """Carts with neither the cart nor any of its lines updated since ``cutoff``."""
+        recent_lines = CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff)
+        return self.filter(updated_at__lt=cutoff).exclude(Exists(recent_lines))
+
+
 class Cart(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Scanned by RedisCartStorage.reconcile on every flush and by CartQuerySet.stale.
+            models.Index(fields=['updated_at'], name='cart_updated_at_idx'),
+        ]
+
     @property
     def total(self):
-        return sum(item.subtotal for item in self.items.all())
+        return self.items.summary()['total']
 
     def __str__(self):
         return f"Cart of {self.user}"
 
 
+class CartItemQuerySet(models.QuerySet):
+    def summary(self):
+        """Line count, total quantity and grand total of these lines in one aggregate query."""
+        summary = self.aggregate(
+            line_count=Count('pk'),
+            total_quantity=Sum('quantity'),
+            grand_total=Sum(F('unit_price') * F('quantity'), output_field=DecimalField(max_digits=12, decimal_places=2)),
+        )
+        return {
+            'item_count': summary['line_count'],
+            'quantity': summary['total_quantity'] or 0,
+            'total': summary['grand_total'] or Decimal('0.00'),
+        }
+
+    def reprice(self, product_ids, batch_size=1000):
+        """Copy the current price of these products onto their lines, ``batch_size`` lines per UPDATE.
+
+        Each batch is a single UPDATE with a correlated subquery on the product
+        table, so no prices pass through Python. Returns the ids of the users
+        whose carts changed.
+        """
+        stale = self.filter(product_id__in=product_ids).exclude(unit_price=F('product__unit_price'))
+        current_price = Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('unit_price')[:1])
+        user_ids = set()
+        while batch := list(stale.values_list('pk', 'cart__user_id')[:batch_size]):
+            self.filter(pk__in=[pk for pk, _ in batch]).update(unit_price=current_price, updated_at=timezone.now())
+            user_ids.update(user_id for _, user_id in batch)
+        return user_ids
+
+    def add_product(self, cart_id, product_id, quantity):
+        """Add ``quantity`` of a product to a cart in one atomic statement.
+
+        Inserts the line at the product's current price, or increments an
+        existing line in place, so concurrent adds never lose an increment.
+        Returns the resulting line, or None when the product does not exist
+        or the cart would hold more than its stock.
+        """
+        connection = connections[router.db_for_write(self.model)]
+        qn = connection.ops.quote_name
+        meta, product_meta = self.model._meta, Product._meta
+        item, product = qn(meta.db_table), qn(product_meta.db_table)
+        stock = f'SELECT {qn("stock")} FROM {product} WHERE {qn("id")} = excluded.{qn("product_id")}'
+
+        def prep(model, field_name, value):
+            return model._meta.get_field(field_name).get_db_prep_value(value, connection)
+
+        now = prep(self.model, 'created_at', timezone.now())
+        sql = f"""
+            INSERT INTO {item} ({qn("id")}, {qn("cart_id")}, {qn("product_id")}, {qn("unit_price")},
+                                {qn("quantity")}, {qn("created_at")}, {qn("updated_at")})
+            SELECT %s, %s, {qn("id")}, {qn("unit_price")}, %s, %s, %s FROM {product}
+            WHERE {qn("id")} = %s AND {qn("stock")} >= %s
+            ON CONFLICT ({qn("cart_id")}, {qn("product_id")}) DO UPDATE SET
+                {qn("quantity")} = {item}.{qn("quantity")} + excluded.{qn("quantity")},
+                {qn("unit_price")} = excluded.{qn("unit_price")},
+                {qn("updated_at")} = excluded.{qn("updated_at")}
+            WHERE {item}.{qn("quantity")} + excluded.{qn("quantity")} <= ({stock})
+            RETURNING {qn("id")}, {qn("unit_price")}, {qn("quantity")}
+        """
+        params = [
+            prep(self.model, 'id', uuid.uuid4()), prep(Cart, 'id', cart_id), quantity, now, now,
+            prep(Product, 'id', product_id), quantity,
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        item_id, unit_price, quantity = row
+        price_field = meta.get_field('unit_price')
+        return self.model(
+            id=meta.get_field('id').to_python(item_id), cart_id=cart_id, product_id=product_id,
+            unit_price=price_field.to_python(unit_price).quantize(Decimal(10) ** -price_field.decimal_places),
+            quantity=quantity,
+        )
+
+
 class CartItem(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     cart = models.ForeignKey(Cart, related_name="items", on_delete=models.CASCADE)
@@ -28,6 +123,8 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CartItemQuerySet.as_manager()
+
     class Meta:
         unique_together = ("cart", "product")
 
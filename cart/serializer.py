@@ -1,8 +1,9 @@
+from django.utils import timezone
 from rest_framework import serializers
 
 from store.models import Product
 from store.serializers import CategorySerializer
-from .models import CartItem
+from .models import Cart, CartItem
 
 class AddToCartSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,36 +13,115 @@ class AddToCartSerializer(serializers.ModelSerializer):
     def validate_quantity(self, value):
         if value <= 0:
             raise serializers.ValidationError("Quantity must be greater than zero.")
-        product = self.initial_data.get('product')
-        if product:
-            try:
-                product_instance = self.Meta.model._meta.get_field('product').related_model.objects.get(id=product)
-                if value > product_instance.stock:
-                    raise serializers.ValidationError("Requested quantity exceeds available stock.")
-            except self.Meta.model._meta.get_field('product').related_model.DoesNotExist:
-                raise serializers.ValidationError("Product does not exist.")
-
         return value
 
+    def validate(self, attrs):
+        # The product was already fetched by its field; the cumulative stock check happens in the upsert.
+        if attrs['quantity'] > attrs['product'].stock:
+            raise serializers.ValidationError({'quantity': ["Requested quantity exceeds available stock."]})
+        return attrs
+
 
 class RemoveFromCartSerializer(serializers.Serializer):
     product_id = serializers.UUIDField()
 
 
+class CartOperationSerializer(serializers.Serializer):
+    OPERATIONS = ('set', 'add', 'remove')
+
+    op = serializers.ChoiceField(choices=OPERATIONS)
+    product = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs['op'] == 'add' and not attrs.get('quantity'):
+            raise serializers.ValidationError({'quantity': ["Quantity must be greater than zero."]})
+        if attrs['op'] == 'set' and 'quantity' not in attrs:
+            raise serializers.ValidationError({'quantity': ["This field is required."]})
+        return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """Apply a list of set/add/remove operations to a cart in one go.
+
+    Operations run in order, so several of them may touch the same product;
+    only the final quantities are checked against stock and written.
+    """
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
+
+    def apply(self, cart):
+        """Write the operations to ``cart``; call inside a transaction."""
+        operations = self.validated_data['operations']
+        product_ids = {operation['product'] for operation in operations}
+        products = Product.objects.only('id', 'unit_price', 'stock').in_bulk(product_ids)
+        errors = {
+            index: {'product': ["Product does not exist."]}
+            for index, operation in enumerate(operations) if operation['product'] not in products
+        }
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+
+        # Locking the cart holds off concurrent inserts of its lines, which only the
+        # existing lines' row locks would let race the bulk_create below.
+        Cart.objects.select_for_update().get(pk=cart.pk)
+        lines = {
+            item.product_id: item
+            for item in CartItem.objects.select_for_update().filter(cart=cart, product_id__in=product_ids)
+        }
+        quantities = {product_id: item.quantity for product_id, item in lines.items()}
+        last_operation = {}
+        for index, operation in enumerate(operations):
+            product_id = operation['product']
+            if operation['op'] == 'add':
+                quantities[product_id] = quantities.get(product_id, 0) + operation['quantity']
+            else:
+                quantities[product_id] = operation.get('quantity', 0) if operation['op'] == 'set' else 0
+            last_operation[product_id] = index
+
+        errors = {
+            last_operation[product_id]: {'quantity': ["Requested quantity exceeds available stock."]}
+            for product_id, quantity in quantities.items() if quantity > products[product_id].stock
+        }
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+
+        now = timezone.now()
+        created, updated, removed = [], [], []
+        for product_id, quantity in quantities.items():
+            item, unit_price = lines.get(product_id), products[product_id].unit_price
+            if not quantity:
+                if item is not None:
+                    removed.append(product_id)
+            elif item is None:
+                created.append(CartItem(cart=cart, product_id=product_id, quantity=quantity, unit_price=unit_price))
+            elif (item.quantity, item.unit_price) != (quantity, unit_price):
+                item.quantity, item.unit_price, item.updated_at = quantity, unit_price, now
+                updated.append(item)
+        if created:
+            CartItem.objects.bulk_create(created)
+        if updated:
+            CartItem.objects.bulk_update(updated, ['quantity', 'unit_price', 'updated_at'])
+        if removed:
+            CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+
+
 from rest_framework import serializers
+from api.fieldsets import SparseFieldsetMixin
 from .models import CartItem
 from store.models import Product, Category
+from store.serializers import ProductSerializer
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('id', 'name', 'slug')
 
 
-class GetAllCartItemsSerializer(serializers.ModelSerializer):
-    class ProductInlineSerializer(serializers.ModelSerializer):
+class GetAllCartItemsSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class ProductInlineSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
         category = CategorySerializer()
+        images = ProductSerializer.ProductImageSerializer(many=True, read_only=True)
 
         class Meta:
             model = Product
@@ -54,10 +134,25 @@ class GetAllCartItemsSerializer(serializers.ModelSerializer):
                 'stock',
                 'preview',
                 'category',
+                'images',
             )
+            expandable_fields = ('images',)
 
     product = ProductInlineSerializer(read_only=True)
 
     class Meta:
         model = CartItem
         fields = ('id', 'product', 'unit_price', 'quantity', 'subtotal')
+        source_fields = {'subtotal': ('unit_price', 'quantity')}
+
+
+class CartSummarySerializer(serializers.Serializer):
+    item_count = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    total = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
+class CartSerializer(serializers.Serializer):
+    """Shape of the cart responses; the views serialize ``items`` on their own so it honours fieldsets."""
+    items = GetAllCartItemsSerializer(many=True)
+    summary = CartSummarySerializer()
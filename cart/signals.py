@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from store.models import Product
+from .tasks import queue_cart_repricing
+
+
+@receiver(post_save, sender=Product)
+def schedule_cart_repricing(sender, instance, created, **kwargs):
+    if not created and instance.changed_fields(['unit_price']):
+        transaction.on_commit(lambda: queue_cart_repricing([str(instance.pk)]))
@@ -0,0 +1,605 @@
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from api.fieldsets import trim_queryset
+from store.models import Product
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+
+def summarize_lines(items):
+    """Python counterpart of ``CartItemQuerySet.summary`` for lines already in memory."""
+    return {
+        'item_count': len(items),
+        'quantity': sum(item.quantity for item in items),
+        'total': sum((item.subtotal for item in items), Decimal('0.00')),
+    }
+
+
+def render_lines(lines, serializer):
+    """Attach the products ``serializer`` renders to in-memory ``{product id: CartItem}`` lines.
+
+    Lines of products that no longer exist are left out of the items and the summary.
+    """
+    products = Product.objects.filter(pk__in=lines)
+    product_field = getattr(serializer, 'child', serializer).fields.get('product')
+    products = trim_queryset(products, product_field) if product_field else products.only('pk')
+    items = []
+    for product in products:
+        item = lines[product.pk]
+        item.product = product
+        items.append(item)
+    return items, summarize_lines(items)
+
+
+class BaseCartStorage:
+    """Where the active cart of a user lives between requests.
+
+    Every cart endpoint goes through the configured storage, so they all see
+    the same lines whichever backend holds them.
+    """
+
+    def add(self, user, product, quantity):
+        """Add ``quantity`` of ``product``; return the resulting line, or None when stock runs out."""
+        raise NotImplementedError
+
+    def remove(self, user, product_id):
+        """Drop the product's line; return whether there was one."""
+        raise NotImplementedError
+
+    def get_cart(self, user, serializer):
+        """Lines ready for ``serializer`` plus their ``item_count``/``quantity``/``total`` summary."""
+        raise NotImplementedError
+
+    @contextmanager
+    def database_writes(self, user):
+        """Keep every write to the cart in the database while the block writes to its rows directly."""
+        yield
+
+    def flush(self):
+        """Write pending changes back to the database; return how many carts were written."""
+        return 0
+
+    def reprice(self, user_ids, prices):
+        """Apply ``{product id: unit price}`` to copies of these users' carts held outside the database."""
+
+
+class DatabaseCartStorage(BaseCartStorage):
+    """Read and write ``Cart``/``CartItem`` rows directly."""
+
+    def add(self, user, product, quantity):
+        cart = Cart.objects.get_or_create(user=user)[0]
+        return CartItem.objects.add_product(cart.id, product.id, quantity)
+
+    def remove(self, user, product_id):
+        return CartItem.objects.filter(cart__user=user, product_id=product_id).delete()[0] > 0
+
+    def get_cart(self, user, serializer):
+        lines = CartItem.objects.filter(cart__user=user)
+        return trim_queryset(lines, serializer), lines.summary()
+
+
+# While KEYS[3] (the pin) exists, the cart lives in the database: the scripts below leave the hash alone.
+ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then return {-2} end
+if redis.call('EXISTS', KEYS[1]) == 0 then return {0} end
+local id, quantity = ARGV[2], tonumber(ARGV[3])
+local line = redis.call('HGET', KEYS[1], ARGV[1])
+if line then
+    local current
+    id, current = string.match(line, '^([^:]+):(%d+):')
+    quantity = quantity + tonumber(current)
+end
+if quantity > tonumber(ARGV[4]) then return {-1} end
+redis.call('HSET', KEYS[1], ARGV[1], id .. ':' .. quantity .. ':' .. ARGV[5])
+redis.call('HINCRBY', KEYS[1], '_v', 1)
+redis.call('PERSIST', KEYS[1])
+redis.call('SADD', KEYS[2], ARGV[6])
+return {1, id, quantity}
+"""
+
+REMOVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then return -2 end
+if redis.call('EXISTS', KEYS[1]) == 0 then return -1 end
+local removed = redis.call('HDEL', KEYS[1], ARGV[1])
+if removed == 1 then
+    redis.call('HINCRBY', KEYS[1], '_v', 1)
+    redis.call('PERSIST', KEYS[1])
+    redis.call('SADD', KEYS[2], ARGV[2])
+end
+return removed
+"""
+
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return -1 end
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], '_v', 0, '_g', ARGV[2], '_t', ARGV[3], unpack(ARGV, 4))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Rewrites the price of the listed products' lines, marking the cart dirty if any changed. The
+# database lines were repriced first, so the copy now matches them as of ARGV[2].
+REPRICE_SCRIPT = """
+if redis.call('EXISTS', KEYS[3]) == 1 then return 0 end
+local changed = 0
+for i = 3, #ARGV, 2 do
+    local line = redis.call('HGET', KEYS[1], ARGV[i])
+    if line then
+        local id, quantity = string.match(line, '^([^:]+):(%d+):')
+        redis.call('HSET', KEYS[1], ARGV[i], id .. ':' .. quantity .. ':' .. ARGV[i + 1])
+        changed = 1
+    end
+end
+if changed == 1 then
+    redis.call('HSET', KEYS[1], '_t', ARGV[2])
+    redis.call('HINCRBY', KEYS[1], '_v', 1)
+    redis.call('PERSIST', KEYS[1])
+    redis.call('SADD', KEYS[2], ARGV[1])
+end
+return changed
+"""
+
+# Pins are counted, so overlapping direct writes keep the cart pinned until the last one ends.
+PIN_SCRIPT = """
+local pins = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return pins
+"""
+
+UNPIN_SCRIPT = """
+if redis.call('DECR', KEYS[1]) <= 0 then redis.call('DEL', KEYS[1]) end
+return 1
+"""
+
+# Runs after a write-back of the hash loaded as generation ARGV[1]: copies in the database lines
+# that won the merge and the new sync time, and expires (or with ARGV[3] = 0 evicts) the hash
+# only if nothing changed it since the snapshot at version ARGV[2].
+SETTLE_SCRIPT = """
+if redis.call('HGET', KEYS[1], '_g') ~= ARGV[1] then return 0 end
+local clean = redis.call('HGET', KEYS[1], '_v') == ARGV[2]
+if clean and ARGV[3] == '0' then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+redis.call('HSET', KEYS[1], '_t', ARGV[4], unpack(ARGV, 5))
+if clean then redis.call('EXPIRE', KEYS[1], ARGV[3]) end
+return 1
+"""
+
+
+class RedisCartStorage(BaseCartStorage):
+    """Keep active carts in Redis hashes and write them back to the database in batches.
+
+    Each cart is a hash of ``product id -> "line id:quantity:unit price"`` plus a
+    ``_v`` change counter, a ``_g`` generation id and the ``_t`` time it last
+    matched the database, in the ``CART_STORAGE_CACHE`` django-redis cache; it is
+    loaded from the database on first use. Adds and removes are single-field Lua
+    scripts that also put the user in a dirty set, and ``flush`` (run periodically
+    by ``cart.tasks.flush_hot_carts``) writes the dirty carts back. Dirty hashes
+    never expire, clean ones after ``CART_HOT_TIMEOUT`` seconds, so Redis should
+    run with persistence (AOF) and without eviction: without AOF, losing Redis
+    loses the writes since the last flush, up to ``CART_FLUSH_INTERVAL`` seconds.
+
+    When Redis cannot be reached the requests fall back to the database and stamp
+    the cart; the next ``flush`` merges the Redis copies of stamped carts with the
+    lines written meanwhile.
+    """
+    dirty_key = 'cart:dirty'
+    reconciled_key = 'cart:reconciled'
+    # Upper bound on a direct write, after which a pin left by a crashed request expires.
+    pin_timeout = 60
+    # Carts stamped this long before the last reconcile are looked at again, for writes still in flight.
+    reconcile_overlap = 60
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+
+        self.client = get_redis_connection(settings.CART_STORAGE_CACHE)
+        self.database = DatabaseCartStorage()
+        self.add_script = self.client.register_script(ADD_SCRIPT)
+        self.remove_script = self.client.register_script(REMOVE_SCRIPT)
+        self.load_script = self.client.register_script(LOAD_SCRIPT)
+        self.settle_script = self.client.register_script(SETTLE_SCRIPT)
+        self.reprice_script = self.client.register_script(REPRICE_SCRIPT)
+        self.pin_script = self.client.register_script(PIN_SCRIPT)
+        self.unpin_script = self.client.register_script(UNPIN_SCRIPT)
+
+    @staticmethod
+    def cart_key(user_id):
+        return f'cart:hot:{user_id}'
+
+    @staticmethod
+    def pin_key(user_id):
+        return f'cart:pin:{user_id}'
+
+    @staticmethod
+    def decode(data):
+        """``{product id: CartItem}`` from a raw hash."""
+        lines = {}
+        for field, value in data.items():
+            field = field.decode()
+            if field.startswith('_'):
+                continue
+            line_id, quantity, unit_price = value.decode().split(':')
+            product_id = uuid.UUID(field)
+            lines[product_id] = CartItem(
+                id=uuid.UUID(line_id), product_id=product_id, quantity=int(quantity), unit_price=Decimal(unit_price)
+            )
+        return lines
+
+    @staticmethod
+    def encode(item):
+        return f'{item.id}:{item.quantity}:{item.unit_price}'
+
+    def load(self, user_id):
+        """Copy the database cart into Redis unless it is already there."""
+        # Taken before the read, so lines written meanwhile count as newer than the copy.
+        synced = time.time()
+        fields = []
+        for item in CartItem.objects.filter(cart__user_id=user_id).only('id', 'product_id', 'quantity', 'unit_price'):
+            fields += [str(item.product_id), self.encode(item)]
+        self.load_script(
+            keys=[self.cart_key(user_id), self.pin_key(user_id)],
+            args=[settings.CART_HOT_TIMEOUT, uuid.uuid4().hex, synced, *fields],
+        )
+
+    def touch(self, user_id):
+        """Stamp the database cart so the next ``flush`` reconciles its Redis copy with it."""
+        Cart.objects.filter(user_id=user_id).update(updated_at=timezone.now())
+
+    def run(self, operation, fallback, user_id=None):
+        """Run ``operation`` against Redis, or ``fallback`` against the database when Redis fails.
+
+        Pass the ``user_id`` of a fallback that writes, so the cart gets stamped.
+        """
+        from redis.exceptions import RedisError
+
+        try:
+            return operation()
+        except RedisError:
+            logger.warning('Hot cart storage unavailable; falling back to the database.', exc_info=True)
+            result = fallback()
+            if user_id is not None:
+                self.touch(user_id)
+            return result
+
+    def add(self, user, product, quantity):
+        def operation():
+            keys = [self.cart_key(user.pk), self.dirty_key, self.pin_key(user.pk)]
+            args = [str(product.pk), str(uuid.uuid4()), quantity, product.stock, str(product.unit_price), str(user.pk)]
+            result = self.add_script(keys=keys, args=args)
+            if result[0] == 0:
+                self.load(user.pk)
+                result = self.add_script(keys=keys, args=args)
+            if result[0] == -2:
+                return self.database.add(user, product, quantity)
+            if result[0] != 1:
+                return None
+            return CartItem(
+                id=uuid.UUID(result[1].decode()), product_id=product.pk, quantity=int(result[2]),
+                unit_price=product.unit_price,
+            )
+
+        return self.run(operation, lambda: self.database.add(user, product, quantity), user.pk)
+
+    def remove(self, user, product_id):
+        def operation():
+            keys = [self.cart_key(user.pk), self.dirty_key, self.pin_key(user.pk)]
+            args = [str(product_id), str(user.pk)]
+            removed = self.remove_script(keys=keys, args=args)
+            if removed == -1:
+                self.load(user.pk)
+                removed = self.remove_script(keys=keys, args=args)
+            if removed == -2:
+                return self.database.remove(user, product_id)
+            return removed == 1
+
+        return self.run(operation, lambda: self.database.remove(user, product_id), user.pk)
+
+    def get_cart(self, user, serializer):
+        def read():
+            pipeline = self.client.pipeline()
+            pipeline.exists(self.pin_key(user.pk))
+            pipeline.hgetall(self.cart_key(user.pk))
+            return pipeline.execute()
+
+        def operation():
+            pinned, data = read()
+            if not pinned and not data:
+                self.load(user.pk)
+                pinned, data = read()
+            if pinned:
+                return self.database.get_cart(user, serializer)
+            return render_lines(self.decode(data), serializer)
+
+        return self.run(operation, lambda: self.database.get_cart(user, serializer))
+
+    @contextmanager
+    def database_writes(self, user):
+        """Pin the cart to the database, then write back and evict its hash, for the length of the block.
+
+        While pinned, adds, removes and reads of the cart go to the database and
+        nothing loads a new hash, so requests racing the block neither lose their
+        writes nor copy rows the block is still changing into Redis.
+        """
+        pin_key = self.pin_key(user.pk)
+        pinned = self.run(lambda: bool(self.pin_script(keys=[pin_key], args=[self.pin_timeout])), lambda: False)
+        try:
+            evicted = pinned and self.run(lambda: self.write_back([user.pk], evict=True) or True, lambda: False)
+            yield
+        finally:
+            if pinned:
+                self.run(lambda: self.unpin_script(keys=[pin_key]), lambda: None)
+        if not evicted:
+            # A hash may have survived; the stamp makes the next flush merge the rows written above into it.
+            self.touch(user.pk)
+
+    def flush(self, batch_size=None):
+        batch_size = batch_size or settings.CART_FLUSH_BATCH_SIZE
+        self.reconcile(batch_size)
+        flushed = 0
+        while user_ids := self.client.spop(self.dirty_key, batch_size):
+            user_ids = [uuid.UUID(user_id.decode()) for user_id in user_ids]
+            try:
+                self.write_back(user_ids)
+            except Exception:
+                self.client.sadd(self.dirty_key, *map(str, user_ids))
+                raise
+            flushed += len(user_ids)
+        return flushed
+
+    def reprice(self, user_ids, prices):
+        # Marking the carts dirty makes the next flush rewrite any older snapshot a running flush still holds.
+        fields = [str(value) for product_id, price in prices.items() for value in (product_id, price)]
+        synced = time.time()
+        pipeline = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            self.reprice_script(
+                keys=[self.cart_key(user_id), self.dirty_key, self.pin_key(user_id)],
+                args=[str(user_id), synced, *fields], client=pipeline,
+            )
+        pipeline.execute()
+
+    def reconcile(self, batch_size):
+        """Merge the Redis copies of the carts stamped since the last call with their database lines."""
+        now = time.time()
+        since = self.client.set(self.reconciled_key, now, get=True)
+        if since is None:
+            return
+        since = datetime.fromtimestamp(float(since) - self.reconcile_overlap, tz=dt_timezone.utc)
+        user_ids = Cart.objects.filter(updated_at__gte=since).values_list('user_id', flat=True).iterator()
+        while batch := list(islice(user_ids, batch_size)):
+            self.write_back(batch)
+
+    def write_back(self, user_ids, evict=False):
+        """Merge the Redis copies of these users' carts into their database lines.
+
+        Lines the copy holds are written to the database, and database lines it
+        lacks are deleted, unless the database line changed after the copy last
+        matched the database: such lines were written while Redis was unreachable,
+        so they are kept and copied into Redis instead.
+        """
+        pipeline = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.hgetall(self.cart_key(user_id))
+        snapshots = {
+            user_id: (data[b'_g'].decode(), int(data[b'_v']), float(data[b'_t']), self.decode(data))
+            for user_id, data in zip(user_ids, pipeline.execute()) if data
+        }
+        if not snapshots:
+            return
+
+        product_ids = {product_id for *_, lines in snapshots.values() for product_id in lines}
+        existing_products = set(Product.objects.filter(pk__in=product_ids).values_list('pk', flat=True))
+        now = timezone.now()
+        newer = {}
+        with transaction.atomic():
+            Cart.objects.bulk_create([Cart(user_id=user_id) for user_id in snapshots], ignore_conflicts=True)
+            carts = Cart.objects.select_for_update().filter(user_id__in=snapshots).order_by('pk')
+            cart_ids = dict(carts.values_list('user_id', 'id'))
+            # With the carts locked, skip hashes that changed or were evicted since the snapshot: a newer
+            # write-back or a direct write owns those rows now, and changed hashes are dirty again anyway.
+            pipeline = self.client.pipeline(transaction=False)
+            for user_id in snapshots:
+                pipeline.hmget(self.cart_key(user_id), '_g', '_v')
+            for user_id, current in zip(list(snapshots), pipeline.execute()):
+                generation, version, *_ = snapshots[user_id]
+                if current != [generation.encode(), str(version).encode()]:
+                    del snapshots[user_id]
+            stored = {cart_id: {} for cart_id in cart_ids.values()}
+            for item in CartItem.objects.filter(cart_id__in=cart_ids.values()):
+                stored[item.cart_id][item.product_id] = item
+            created, updated, removed = [], [], []
+            for user_id, (_, _, synced, lines) in snapshots.items():
+                items = stored[cart_ids[user_id]]
+                newer[user_id] = [item for item in items.values() if item.updated_at.timestamp() > synced]
+                kept = {item.product_id for item in newer[user_id]}
+                for product_id, line in lines.items():
+                    if product_id not in existing_products or product_id in kept:
+                        continue
+                    kept.add(product_id)
+                    item = items.get(product_id)
+                    if item is None:
+                        line.cart_id = cart_ids[user_id]
+                        created.append(line)
+                    elif (item.quantity, item.unit_price) != (line.quantity, line.unit_price):
+                        item.quantity, item.unit_price, item.updated_at = line.quantity, line.unit_price, now
+                        updated.append(item)
+                removed += [item.pk for product_id, item in items.items() if product_id not in kept]
+            if created:
+                CartItem.objects.bulk_create(created)
+            if updated:
+                CartItem.objects.bulk_update(updated, ['quantity', 'unit_price', 'updated_at'])
+            if removed:
+                CartItem.objects.filter(pk__in=removed).delete()
+        # Read after the commit, so the lines written above are not newer than the copy.
+        synced = time.time()
+
+        pipeline = self.client.pipeline(transaction=False)
+        timeout = 0 if evict else settings.CART_HOT_TIMEOUT
+        for user_id, (generation, version, _, _) in snapshots.items():
+            fields = [value for item in newer[user_id] for value in (str(item.product_id), self.encode(item))]
+            self.settle_script(
+                keys=[self.cart_key(user_id)], args=[generation, version, timeout, synced, *fields], client=pipeline
+            )
+        pipeline.execute()
+
+
+class CartBusy(APIException):
+    """Another request held the guest cart for longer than we were willing to wait."""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The cart is being updated by another request; please retry.'
+    default_code = 'cart_busy'
+
+
+class GuestCartStorage:
+    """Carts of anonymous shoppers, kept in the default cache under a random guest id.
+
+    It mirrors the add/remove/get_cart methods of the user storages with the
+    guest id in place of the user. ``merge`` moves a guest cart into a user's
+    database cart when they sign in.
+    """
+    # A guest cart is one cache value, so changes hold a lock around their
+    # read-modify-write; it expires on its own if its holder dies, and a request
+    # gives up with CartBusy after waiting lock_wait seconds for it.
+    lock_timeout = 5
+    lock_wait = 1
+    lock_poll = 0.01
+
+    @staticmethod
+    def cart_key(guest_id):
+        return f'cart:guest:{guest_id}'
+
+    @contextmanager
+    def locked(self, guest_id):
+        key = f'{self.cart_key(guest_id)}:lock'
+        if hasattr(cache, 'lock'):
+            # django-redis: the lock releases with a compare-and-delete script, so an
+            # expired lock that another request has taken since is left alone.
+            from redis.exceptions import LockError
+
+            lock = cache.lock(key, timeout=self.lock_timeout, sleep=self.lock_poll, blocking_timeout=self.lock_wait)
+            if not lock.acquire():
+                raise CartBusy
+            try:
+                yield
+            finally:
+                try:
+                    lock.release()
+                except LockError:
+                    pass
+            return
+
+        # Caches without atomic compare-and-delete (local development): best-effort release.
+        token, deadline = uuid.uuid4().hex, time.monotonic() + self.lock_wait
+        while not cache.add(key, token, timeout=self.lock_timeout):
+            if time.monotonic() >= deadline:
+                raise CartBusy
+            time.sleep(self.lock_poll)
+        try:
+            yield
+        finally:
+            if cache.get(key) == token:
+                cache.delete(key)
+
+    def get_lines(self, guest_id):
+        if guest_id is None:
+            return {}
+        lines = cache.get(self.cart_key(guest_id)) or {}
+        return {
+            uuid.UUID(product_id): CartItem(
+                id=uuid.UUID(line_id), product_id=uuid.UUID(product_id), quantity=quantity,
+                unit_price=Decimal(unit_price),
+            )
+            for product_id, (line_id, quantity, unit_price) in lines.items()
+        }
+
+    def save_lines(self, guest_id, lines):
+        data = {
+            str(product_id): (str(line.id), line.quantity, str(line.unit_price)) for product_id, line in lines.items()
+        }
+        cache.set(self.cart_key(guest_id), data, timeout=settings.GUEST_CART_TIMEOUT)
+
+    def add(self, guest_id, product, quantity):
+        with self.locked(guest_id):
+            lines = self.get_lines(guest_id)
+            line = lines.get(product.pk) or CartItem(id=uuid.uuid4(), product_id=product.pk, quantity=0)
+            if line.quantity + quantity > product.stock:
+                return None
+            line.quantity += quantity
+            line.unit_price = product.unit_price
+            lines[product.pk] = line
+            self.save_lines(guest_id, lines)
+        return line
+
+    def remove(self, guest_id, product_id):
+        with self.locked(guest_id):
+            lines = self.get_lines(guest_id)
+            if lines.pop(product_id, None) is None:
+                return False
+            self.save_lines(guest_id, lines)
+        return True
+
+    def get_cart(self, guest_id, serializer):
+        return render_lines(self.get_lines(guest_id), serializer)
+
+    def merge(self, guest_id, user):
+        """Add the guest lines to the user's cart in one transaction and drop the guest cart.
+
+        Quantities of products already in the cart are summed and capped at the
+        stock; lines of deleted or sold out products are dropped.
+        """
+        with self.locked(guest_id):
+            lines = self.get_lines(guest_id)
+            if not lines:
+                return
+            # Locking the cart row keeps concurrent inserts of its lines out until the merge commits.
+            with get_cart_storage().database_writes(user), transaction.atomic():
+                cart = Cart.objects.select_for_update().get_or_create(user=user)[0]
+                products = Product.objects.only('id', 'unit_price', 'stock').in_bulk(lines)
+                existing = {
+                    item.product_id: item
+                    for item in CartItem.objects.select_for_update().filter(cart=cart, product_id__in=lines)
+                }
+                now = timezone.now()
+                created, updated = [], []
+                for product_id, line in lines.items():
+                    product = products.get(product_id)
+                    if product is None:
+                        continue
+                    item = existing.get(product_id)
+                    current = item.quantity if item else 0
+                    # Never shrink a line the user already had, even if stock dropped below it since.
+                    quantity = max(min(current + line.quantity, product.stock), current)
+                    if item is None:
+                        if quantity > 0:
+                            created.append(CartItem(
+                                cart=cart, product_id=product_id, quantity=quantity, unit_price=product.unit_price
+                            ))
+                    elif (item.quantity, item.unit_price) != (quantity, product.unit_price):
+                        item.quantity, item.unit_price, item.updated_at = quantity, product.unit_price, now
+                        updated.append(item)
+                if created:
+                    CartItem.objects.bulk_create(created)
+                if updated:
+                    CartItem.objects.bulk_update(updated, ['quantity', 'unit_price', 'updated_at'])
+            cache.delete(self.cart_key(guest_id))
+
+
+def get_cart_storage():
+    return import_string(settings.CART_STORAGE_BACKEND)()
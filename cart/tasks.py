@@ -0,0 +1,43 @@
+import logging
+
+from celery import shared_task
+from kombu.exceptions import OperationalError
+
+from store.models import Product
+from .models import CartItem
+from .storage import get_cart_storage
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def flush_hot_carts():
+    return get_cart_storage().flush()
+
+
+@shared_task
+def reprice_cart_items(product_ids):
+    """Bring every cart line of these products to the current product price.
+
+    Hot carts are flushed first so the database holds every line, and the
+    copies of the affected carts are repriced after the database update.
+    """
+    storage = get_cart_storage()
+    storage.flush()
+    user_ids = CartItem.objects.reprice(product_ids)
+    if user_ids:
+        storage.reprice(user_ids, dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'unit_price')))
+    return len(user_ids)
+
+
+def queue_cart_repricing(product_ids):
+    """Queue ``reprice_cart_items``; return False, logging why, if the broker is unreachable.
+
+    Callers run after their price changes have committed, so an outage must not fail them.
+    """
+    try:
+        reprice_cart_items.delay(product_ids)
+    except OperationalError:
+        logger.exception('Could not queue repricing of cart lines for %d products', len(product_ids))
+        return False
+    return True
@@ -1,3 +1,479 @@
-from django.test import TestCase
+import os
+import threading
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from kombu.exceptions import OperationalError
+from rest_framework.test import APIClient
+
+from store.models import Category, Product
+from store.tests import LOCMEM_CACHES, CatalogTestCase
+from .models import Cart, CartItem
+from .storage import CartBusy, GuestCartStorage, get_cart_storage
+from .tasks import flush_hot_carts, reprice_cart_items
+
+
+def redis_caches(url):
+    return {**LOCMEM_CACHES, 'carts': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': url,
+        'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.5, 'SOCKET_TIMEOUT': 0.5},
+    }}
+
+
+class CartTestCase(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(email='shopper@example.com', password='Secret@123')
+        cls.cart = Cart.objects.create(user=cls.user)
+        cls.products = cls.create_products(3)
+        for product in cls.products:
+            CartItem.objects.create(cart=cls.cart, product=product, unit_price=product.unit_price, quantity=2)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class CartFieldsetTests(CartTestCase):
+    def test_cart_listing_does_not_query_per_line(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('get-all-cart'))
+        self.assertEqual(len(response.data['items']), 3)
+        line = response.data['items'][0]
+        self.assertEqual(line['subtotal'], Decimal(line['unit_price']) * 2)
+        self.assertIn('description', line['product'])
+        self.assertNotIn('images', line['product'])
+
+    def test_fields_trim_the_lines_and_the_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('get-all-cart'), {'fields': 'id,quantity,product.name'})
+        self.assertEqual(list(response.data['items'][0]), ['id', 'product', 'quantity'])
+        self.assertEqual(list(response.data['items'][0]['product']), ['name'])
+        self.assertNotIn('description', queries[0]['sql'])
+
+    def test_expand_adds_product_images(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('get-all-cart'), {'expand': 'product.images', 'omit': 'product.description'})
+        product = response.data['items'][0]['product']
+        self.assertEqual(len(product['images']), 2)
+        self.assertNotIn('description', product)
+
+
+class CartSummaryTests(CartTestCase):
+    def test_summary_is_one_aggregate(self):
+        Product.objects.filter(pk=self.products[0].pk).update(unit_price='1.10')
+        CartItem.objects.filter(product=self.products[0]).update(unit_price='1.10', quantity=3)
+        with CaptureQueriesContext(connection) as queries:
+            summary = self.client.get(reverse('get-all-cart')).data['summary']
+        self.assertEqual(summary, {'item_count': 3, 'quantity': 7, 'total': '53.30'})
+        self.assertEqual(sum('SUM(' in query['sql'] for query in queries), 1)
+        self.assertEqual(self.cart.total, Decimal('53.30'))
+
+    def test_user_without_a_cart_gets_an_empty_summary(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(email='new@example.com', password='x'))
+        response = self.client.get(reverse('get-all-cart'))
+        self.assertEqual(response.data, {'items': [], 'summary': {'item_count': 0, 'quantity': 0, 'total': '0.00'}})
+
+
+class AddToCartTests(CartTestCase):
+    def add(self, product, quantity):
+        return self.client.post(reverse('add-to-cart'), {'product': str(product.id), 'quantity': quantity})
+
+    def test_repeated_adds_increment_the_line(self):
+        product = self.create_products(1, images=0)[0]
+        self.assertEqual(self.add(product, 2).status_code, 201)
+        with self.assertNumQueries(3):
+            response = self.add(product, 3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['quantity'], 5)
+        self.assertEqual(response.data['unit_price'], '12.50')
+        self.assertEqual(response.data['subtotal'], '62.50')
+        item = CartItem.objects.get(cart=self.cart, product=product)
+        self.assertEqual((str(item.id), item.quantity), (response.data['cart_item_id'], 5))
+
+    def test_line_price_follows_the_product_price(self):
+        product = self.products[0]
+        Product.objects.filter(pk=product.pk).update(unit_price='9.99')
+        response = self.add(product, 1)
+        self.assertEqual((response.data['quantity'], response.data['unit_price']), (3, '9.99'))
+
+    def test_cumulative_quantity_cannot_exceed_stock(self):
+        product = self.products[0]  # stock 10, already 2 in the cart
+        self.assertEqual(self.add(product, 8).status_code, 201)
+        response = self.add(product, 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quantity', response.data)
+        self.assertEqual(CartItem.objects.get(cart=self.cart, product=product).quantity, 10)
+        self.assertEqual(self.add(product, 11).status_code, 400)
+
+
+class CartBatchTests(CartTestCase):
+    def batch(self, *operations, **params):
+        url = reverse('cart-batch')
+        if params:
+            url += '?' + '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(url, {'operations': list(operations)}, format='json')
+
+    def quantities(self):
+        return {item.product_id: item.quantity for item in CartItem.objects.filter(cart=self.cart)}
+
+    def test_operations_are_applied_in_order(self):
+        first, second, third = self.products
+        new = self.create_products(1, images=0)[0]
+        response = self.batch(
+            {'op': 'add', 'product': str(first.id), 'quantity': 3},
+            {'op': 'set', 'product': str(second.id), 'quantity': 7},
+            {'op': 'remove', 'product': str(third.id)},
+            {'op': 'add', 'product': str(new.id), 'quantity': 1},
+            {'op': 'add', 'product': str(new.id), 'quantity': 1},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.quantities(), {first.id: 5, second.id: 7, new.id: 2})
+        self.assertEqual(len(response.data['items']), 3)
+        self.assertEqual(response.data['summary'], {'item_count': 3, 'quantity': 14, 'total': '175.00'})
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        extra = self.create_products(10, images=0)
+        operations = [{'op': 'set', 'product': str(product.id), 'quantity': 1} for product in extra]
+        operations += [
+            {'op': 'add', 'product': str(self.products[0].id), 'quantity': 1},
+            {'op': 'remove', 'product': str(self.products[1].id)},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.batch(*operations, fields='id,quantity')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['items']), 12)
+        writes = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertLessEqual(len(writes), 9)
+
+    def test_invalid_batches_change_nothing(self):
+        before = self.quantities()
+        response = self.batch(
+            {'op': 'set', 'product': str(self.products[0].id), 'quantity': 1},
+            {'op': 'add', 'product': '00000000-0000-0000-0000-000000000000', 'quantity': 1},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(1, response.data['operations'])
+
+        response = self.batch(
+            {'op': 'set', 'product': str(self.products[1].id), 'quantity': 1},
+            {'op': 'add', 'product': str(self.products[0].id), 'quantity': 9},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['operations']), [1])
+        self.assertEqual(self.quantities(), before)
+
+        self.assertEqual(self.batch({'op': 'add', 'product': str(self.products[0].id)}).status_code, 400)
+        self.assertEqual(self.batch().status_code, 400)
+
+
+class CartEndpointsMixin:
+    def add(self, product, quantity):
+        return self.client.post(reverse('add-to-cart'), {'product': str(product.id), 'quantity': quantity})
+
+    def remove(self, product):
+        return self.client.post(reverse('remove-from-cart'), {'product_id': str(product.id)})
+
+    def listed(self):
+        return {line['product']['id']: line['quantity'] for line in self.client.get(reverse('get-all-cart')).data['items']}
+
+    def stored(self):
+        return {str(item.product_id): item.quantity for item in CartItem.objects.filter(cart__user=self.user)}
+
+
+class DatabaseCartStorageTests(CartEndpointsMixin, CartTestCase):
+    def test_remove(self):
+        self.assertEqual(self.remove(self.products[0]).status_code, 200)
+        self.assertEqual(self.remove(self.products[0]).status_code, 404)
+        self.assertEqual(len(self.stored()), 2)
+
+    def test_flush_is_a_no_op(self):
+        self.assertEqual(flush_hot_carts(), 0)
+
+
+@override_settings(CART_STORAGE_BACKEND='cart.storage.RedisCartStorage', CART_STORAGE_CACHE='carts')
+class RedisCartStorageTests(CartEndpointsMixin, CartTestCase):
+    def setUp(self):
+        url = os.environ.get('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1')
+        settings_override = override_settings(CACHES=redis_caches(url))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        super().setUp()
+        from redis.exceptions import RedisError
+        try:
+            self.storage = get_cart_storage()
+            self.storage.client.ping()
+        except RedisError:
+            self.skipTest(f'Redis is not reachable at {url}')
+        keys = (
+            self.storage.dirty_key, self.storage.reconciled_key,
+            self.storage.cart_key(self.user.pk), self.storage.pin_key(self.user.pk),
+        )
+        self.storage.client.delete(*keys)
+        self.addCleanup(self.storage.client.delete, *keys)
+
+    def test_writes_stay_in_redis_until_flushed(self):
+        first, second, third = self.products
+        before = self.stored()
+        with self.assertNumQueries(2):  # the product lookup and loading the cart into Redis
+            self.assertEqual(self.add(first, 3).data['quantity'], 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.remove(second).status_code, 200)
+        self.assertEqual(self.remove(second).status_code, 404)
+        self.assertEqual(self.stored(), before)
+
+        expected = {str(first.id): 5, str(third.id): 2}
+        self.assertEqual(self.listed(), expected)
+        self.assertEqual(flush_hot_carts(), 1)
+        self.assertEqual(self.stored(), expected)
+        self.assertEqual(flush_hot_carts(), 0)
+
+    def test_stock_is_checked_against_the_hot_cart(self):
+        self.assertEqual(self.add(self.products[0], 8).status_code, 201)
+        self.assertEqual(self.add(self.products[0], 1).status_code, 400)
+
+    def test_lines_written_while_redis_is_down_survive(self):
+        from redis.exceptions import ConnectionError
+
+        first, second, third = self.products
+        new = self.create_products(1, images=0)[0]
+        self.add(first, 1)
+        flush_hot_carts()
+        with mock.patch('redis.commands.core.Script.__call__', side_effect=ConnectionError):
+            with self.assertLogs('cart.storage', 'WARNING'):
+                self.assertEqual(self.add(new, 2).status_code, 201)
+        self.assertNotIn(str(new.id), self.listed())  # until the next flush reconciles the copy
+
+        flush_hot_carts()
+        self.assertEqual(self.listed()[str(new.id)], 2)
+        self.add(third, 1)
+        flush_hot_carts()
+        expected = {str(first.id): 3, str(second.id): 2, str(third.id): 3, str(new.id): 2}
+        self.assertEqual(self.stored(), expected)
+        self.assertEqual(self.listed(), expected)
+
+    def test_batch_writes_through_the_database(self):
+        self.add(self.products[0], 1)
+        response = self.client.post(reverse('cart-batch'), {'operations': [
+            {'op': 'add', 'product': str(self.products[0].id), 'quantity': 1},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored()[str(self.products[0].id)], 4)
+        self.assertEqual(self.listed()[str(self.products[0].id)], 4)
+
+    def test_writes_racing_a_batch_go_to_the_database(self):
+        first, second, third = self.products
+        self.add(first, 1)
+        with self.storage.database_writes(self.user):
+            self.assertFalse(self.storage.client.exists(self.storage.cart_key(self.user.pk)))
+            self.assertEqual(self.add(second, 1).data['quantity'], 3)
+            self.assertEqual(self.stored()[str(second.id)], 3)
+            self.assertFalse(self.storage.client.exists(self.storage.cart_key(self.user.pk)))
+        expected = {str(first.id): 3, str(second.id): 3, str(third.id): 2}
+        self.assertEqual(self.listed(), expected)
+        self.assertEqual(self.stored(), expected)
+
+
+@override_settings(
+    CART_STORAGE_BACKEND='cart.storage.RedisCartStorage', CART_STORAGE_CACHE='carts',
+    CACHES=redis_caches('redis://127.0.0.1:1/0'),
+)
+class RedisCartStorageFallbackTests(CartEndpointsMixin, CartTestCase):
+    def test_requests_fall_back_to_the_database(self):
+        with self.assertLogs('cart.storage', 'WARNING'):
+            self.assertEqual(self.add(self.products[0], 1).status_code, 201)
+            self.assertEqual(self.remove(self.products[1]).status_code, 200)
+            listed = self.listed()
+        self.assertEqual(listed, self.stored())
+        self.assertEqual(listed, {str(self.products[0].id): 3, str(self.products[2].id): 2})
+
+
+class CartRepricingTests(CartTestCase):
+    def test_price_changes_schedule_repricing_after_commit(self):
+        product = self.products[0]
+        product.stock = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.queue_repricing.assert_not_called()
+        product.unit_price = Decimal('9.99')
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        self.queue_repricing.assert_called_once_with([str(product.pk)])
+
+    def test_broker_outage_is_logged_not_raised(self):
+        self.queue_repricing.side_effect = OperationalError('broker unreachable')
+        product = self.products[0]
+        product.unit_price = Decimal('9.99')
+        with self.assertLogs('cart.tasks', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+    def test_lines_are_repriced_in_batched_updates(self):
+        for index in range(4):
+            user = get_user_model().objects.create_user(email=f'repriced{index}@example.com', password='x')
+            CartItem.objects.create(cart=Cart.objects.create(user=user), product=self.products[0], unit_price='12.50')
+        Product.objects.filter(pk__in=[self.products[0].pk, self.products[1].pk]).update(unit_price='20.00')
+
+        with CaptureQueriesContext(connection) as queries:
+            user_ids = CartItem.objects.reprice([self.products[0].pk, self.products[1].pk], batch_size=2)
+        self.assertEqual(len(user_ids), 5)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 3)
+        self.assertEqual(
+            set(CartItem.objects.filter(product__in=self.products[:2]).values_list('unit_price', flat=True)),
+            {Decimal('20.00')},
+        )
+        self.assertEqual(CartItem.objects.get(cart=self.cart, product=self.products[2]).unit_price, Decimal('12.50'))
+
+    def test_task_reports_the_repriced_carts(self):
+        Product.objects.filter(pk=self.products[0].pk).update(unit_price='1.00')
+        self.assertEqual(reprice_cart_items([str(self.products[0].pk)]), 1)
+        self.assertEqual(self.cart.total, Decimal('52.00'))
+        self.assertEqual(reprice_cart_items([str(self.products[0].pk)]), 0)
+
+
+class CartAdminTests(CartTestCase):
+    def changelist_queries(self, model):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:cart_{model}_changelist'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def add_carts(self, count):
+        for index in range(count):
+            user = get_user_model().objects.create_user(email=f'admin-{count}-{index}@example.com', password='x')
+            cart = Cart.objects.create(user=user)
+            for product in self.products:
+                CartItem.objects.create(cart=cart, product=product, unit_price=product.unit_price, quantity=1)
+
+    def test_changelists_render_in_a_bounded_number_of_queries(self):
+        admin = get_user_model().objects.create_superuser(email='admin@example.com', password='Secret@123')
+        self.client = APIClient()
+        self.client.force_login(admin)
+        few = {model: self.changelist_queries(model)[0] for model in ('cart', 'cartitem')}
+        self.add_carts(4)
+        for model, count in few.items():
+            self.assertEqual(self.changelist_queries(model)[0], count, model)
+
+        response = self.changelist_queries('cart')[1]
+        self.assertContains(response, '<td class="field-total">75.00</td>', html=True)
+
+
+class GuestCartTests(CartEndpointsMixin, CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(
+            email='guest@example.com', password='Secret@123', is_verified=True
+        )
+        cls.products = cls.create_products(3, images=0)
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_guests_use_the_same_endpoints(self):
+        first, second, _ = self.products
+        response = self.add(first, 2)
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(settings.GUEST_CART_COOKIE, response.cookies)
+        self.assertEqual(self.add(first, 1).data['quantity'], 3)
+        self.assertEqual(self.add(first, 8).status_code, 400)
+        self.add(second, 1)
+        self.assertEqual(self.remove(second).status_code, 200)
+        self.assertEqual(self.remove(second).status_code, 404)
+
+        response = self.client.get(reverse('get-all-cart'))
+        self.assertEqual([line['quantity'] for line in response.data['items']], [3])
+        self.assertEqual(response.data['summary'], {'item_count': 1, 'quantity': 3, 'total': '37.50'})
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_tampered_cookies_are_ignored(self):
+        self.add(self.products[0], 1)
+        self.client.cookies[settings.GUEST_CART_COOKIE] = 'forged'
+        self.assertEqual(self.client.get(reverse('get-all-cart')).data['items'], [])
+        self.assertEqual(self.remove(self.products[0]).status_code, 404)
+
+    def test_login_merges_the_guest_cart(self):
+        first, second, third = self.products
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=first, unit_price='1.00', quantity=4)
+        self.add(first, 3)
+        self.add(second, 1)
+        self.add(third, 2)
+        third.delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('login'), {'email': 'guest@example.com', 'password': 'Secret@123'}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.cookies[settings.GUEST_CART_COOKIE].value, '')
+        self.assertEqual(sum(query['sql'].startswith('INSERT INTO "cart_cartitem"') for query in queries), 1)
+        lines = {item.product_id: (item.quantity, item.unit_price) for item in cart.items.all()}
+        self.assertEqual(lines, {first.id: (7, Decimal('12.50')), second.id: (1, Decimal('12.50'))})
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(len(self.client.get(reverse('get-all-cart')).data['items']), 2)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse('get-all-cart')).data['items'], [])
+
+    def test_changes_wait_for_the_guest_cart_lock(self):
+        storage, product = GuestCartStorage(), self.products[0]
+        with storage.locked('guest'):
+            worker = threading.Thread(target=storage.add, args=('guest', product, 1))
+            worker.start()
+            worker.join(0.1)
+            self.assertTrue(worker.is_alive())
+            self.assertEqual(storage.get_lines('guest'), {})
+        worker.join()
+        self.assertEqual(storage.get_lines('guest')[product.pk].quantity, 1)
+
+    def test_contended_guest_cart_gives_up_with_409(self):
+        storage, product = GuestCartStorage(), self.products[0]
+        storage.lock_wait = 0.05
+        with storage.locked('guest'):
+            with self.assertRaises(CartBusy) as raised:
+                storage.add('guest', product, 1)
+            self.assertEqual(raised.exception.status_code, 409)
+        self.assertEqual(storage.add('guest', product, 1).quantity, 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConcurrentAddToCartTests(TransactionTestCase):
+    workers = 8
+    adds_per_worker = 5
+
+    def test_concurrent_adds_do_not_lose_increments(self):
+        user = get_user_model().objects.create_user(email='racer@example.com', password='Secret@123')
+        cart = Cart.objects.create(user=user)
+        product = Product.objects.create(
+            category=Category.objects.create(name='Race'), name='Contended', unit_price='5.00', stock=1000
+        )
+        barrier = threading.Barrier(self.workers)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.adds_per_worker):
+                    self.assertIsNotNone(CartItem.objects.add_product(cart.id, product.id, 1))
+            except Exception as ex:  # surfaced in the main thread below
+                errors.append(ex)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        item = CartItem.objects.get(cart=cart, product=product)
+        self.assertEqual(item.quantity, self.workers * self.adds_per_worker)
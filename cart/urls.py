@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import AddToCartView, RemoveFromCartApiView, GetAllCart
+from .views import AddToCartView, RemoveFromCartApiView, GetAllCart, CartBatchView
 
 urlpatterns = [
     path('add/', AddToCartView.as_view(), name='add-to-cart'),
     path('remove/', RemoveFromCartApiView.as_view(), name='remove-from-cart'),
+    path('batch/', CartBatchView.as_view(), name='cart-batch'),
     path('', GetAllCart.as_view(), name='get-all-cart'),
 ]
\ No newline at end of file
@@ -1,16 +1,23 @@
+from django.db import transaction
 from drf_spectacular.utils import extend_schema, OpenApiResponse
-from rest_framework.generics import get_object_or_404, ListAPIView
+from rest_framework.generics import GenericAPIView
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from cart.models import Cart, CartItem
-from cart.serializer import AddToCartSerializer, RemoveFromCartSerializer, GetAllCartItemsSerializer
+from api.fieldsets import FIELDSET_PARAMETERS
+from cart.models import Cart
+from cart.serializer import (
+    AddToCartSerializer, CartBatchSerializer, CartSerializer, CartSummarySerializer, RemoveFromCartSerializer,
+    GetAllCartItemsSerializer,
+)
+from cart.guest import get_request_cart, new_guest_cart_id, set_guest_cart_cookie
+from cart.storage import CartBusy, get_cart_storage
 
 
 class AddToCartView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     @extend_schema(
         request=AddToCartSerializer,
@@ -40,33 +47,31 @@ class AddToCartView(APIView):
         serializer = AddToCartSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
 
-        cart = Cart.objects.get_or_create(user=request.user)[0]
-        existing_items = CartItem.objects.filter(cart=cart, product=serializer.validated_data['product'])
-        if existing_items.exists():
-            item = existing_items.first()
-            item.quantity += serializer.validated_data['quantity']
-            item.unit_price = item.product.unit_price
-            item.save()
-        else:
-            item = CartItem.objects.create(
-                cart=cart,
-                product=serializer.validated_data['product'],
-                quantity=serializer.validated_data['quantity'],
-                unit_price=serializer.validated_data['product'].unit_price
+        storage, owner = get_request_cart(request)
+        new_guest_id = None
+        if owner is None:
+            owner = new_guest_id = new_guest_cart_id()
+        item = storage.add(owner, serializer.validated_data['product'], serializer.validated_data['quantity'])
+        if item is None:
+            return Response(
+                {"quantity": ["Requested quantity exceeds available stock."]}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        return Response({
+        response = Response({
             "message": "Product added to cart successfully",
             "cart_item_id": str(item.id),
-            "product": str(item.product.id),
+            "product": str(item.product_id),
             "quantity": item.quantity,
             "unit_price": str(item.unit_price),
             "subtotal": str(item.subtotal)
         }, status=status.HTTP_201_CREATED)
+        if new_guest_id:
+            set_guest_cart_cookie(response, new_guest_id)
+        return response
 
 
 class RemoveFromCartApiView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [AllowAny]
 
     @extend_schema(
         request=RemoveFromCartSerializer,
@@ -98,37 +103,66 @@ class RemoveFromCartApiView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         product_id = serializer.validated_data['product_id']
         try:
-            cart = get_object_or_404(Cart, user=request.user)
-            if not cart:
-                return Response({"detail": "Cart not found."}, status=status.HTTP_404_NOT_FOUND)
-            cart_item = get_object_or_404(CartItem, cart=cart, product__id=product_id)
-            if not cart_item:
-                return Response({"detail": "Product not found in cart."}, status=status.HTTP_404_NOT_FOUND)
-            cart_item.delete()
-            return Response({"message": "Product removed from cart successfully."}, status=status.HTTP_200_OK)
+            storage, owner = get_request_cart(request)
+            removed = owner is not None and storage.remove(owner, product_id)
+        except CartBusy:
+            raise
         except Exception as e:
             return Response({"detail": "Something went wrong. Please try again after some time."},
                             status=status.HTTP_400_BAD_REQUEST)
+        if not removed:
+            return Response({"detail": "Product not found in cart."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Product removed from cart successfully."}, status=status.HTTP_200_OK)
 
 
-@extend_schema(
-    responses={
-        200: OpenApiResponse(response=GetAllCartItemsSerializer(many=True)),
-        401: {
-            "type": "object",
-            "properties": {
-                "detail": {"type": "string"}
-            }
+class CartResponseMixin:
+    """Render a cart as its lines plus a summary, in a fixed number of queries."""
+    serializer_class = GetAllCartItemsSerializer
+
+    def get_cart_data(self, storage, owner):
+        serializer = self.serializer_class(context=self.get_serializer_context())
+        items, summary = storage.get_cart(owner, serializer)
+        return {
+            'items': self.get_serializer(items, many=True).data,
+            'summary': CartSummarySerializer(summary).data,
         }
-    },
-    tags=['Cart']
-)
-class GetAllCart(ListAPIView):
+
+
+class GetAllCart(CartResponseMixin, GenericAPIView):
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        parameters=FIELDSET_PARAMETERS,
+        responses={200: OpenApiResponse(response=CartSerializer)},
+        tags=['Cart']
+    )
+    def get(self, request):
+        return Response(self.get_cart_data(*get_request_cart(request)))
+
+
+class CartBatchView(CartResponseMixin, GenericAPIView):
+    """Apply a batch of set/add/remove operations and return the resulting cart."""
     permission_classes = [IsAuthenticated]
-    serializer_class = GetAllCartItemsSerializer
 
-    def get_queryset(self):
-        cart = getattr(self.request.user, 'cart', None)
-        if cart:
-            return CartItem.objects.filter(cart=cart)
-        return CartItem.objects.none()
+    @extend_schema(
+        request=CartBatchSerializer,
+        parameters=FIELDSET_PARAMETERS,
+        responses={
+            200: OpenApiResponse(response=CartSerializer),
+            400: {
+                "type": "object",
+                "properties": {
+                    "operations": {"type": "object"}
+                }
+            }
+        },
+        tags=['Cart']
+    )
+    def post(self, request):
+        batch = CartBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        storage = get_cart_storage()
+        with storage.database_writes(request.user), transaction.atomic():
+            cart = Cart.objects.get_or_create(user=request.user)[0]
+            batch.apply(cart)
+        return Response(self.get_cart_data(storage, request.user), status=status.HTTP_200_OK)
@@ -6,39 +6,39 @@ import random
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django.setup()
 
+from api.cache import CATALOG_CACHE_NAMESPACE, bump_cache_version
+from store.merchandising import PROMO_FLAG_WEIGHTS, random_promo_flags, refresh_collections
 from store.models import Product
 
-products = Product.objects.all()
+BATCH_SIZE = int(os.environ.get('SEED_BATCH_SIZE', 2000))
+FLAG_FIELDS = list(PROMO_FLAG_WEIGHTS)
 
-if not products:
+rng = random.Random(os.environ.get('SEED'))
+products = Product.objects.only('pk', *FLAG_FIELDS).order_by('pk')
+total = products.count()
+
+if not total:
     print("❌ No products found!")
     exit()
 
-print(f"🟢 Updating {products.count()} existing products...")
-
-def chance(prob):
-    """Return True based on probability (0.0 – 1.0)."""
-    return random.random() < prob
-
-for product in products:
-    # Weighted TRUE/FALSE values
-    flags = {
-        "is_featured": chance(0.30),            # 30% chance
-        "is_flash_sale": chance(0.10),          # 10% chance
-        "is_product_of_the_day": chance(0.05),  # 5% chance
-        "is_best_seller": chance(0.15),         # 15% chance
-        "is_attractive_offer": chance(0.20),    # 20% chance
-    }
-
-    # Ensure at least one flag is True
-    if not any(flags.values()):
-        random_key = random.choice(list(flags.keys()))
-        flags[random_key] = True
-
-    # Assign values to product
-    for key, value in flags.items():
+print(f"🟢 Updating {total} existing products in batches of {BATCH_SIZE}...")
+
+batch = []
+for product in products.iterator(chunk_size=BATCH_SIZE):
+    # Weighted TRUE/FALSE values, at least one of them TRUE
+    for key, value in random_promo_flags(rng).items():
         setattr(product, key, value)
+    batch.append(product)
+
+    if len(batch) == BATCH_SIZE:
+        Product.objects.bulk_update(batch, FLAG_FIELDS)
+        batch = []
+
+if batch:
+    Product.objects.bulk_update(batch, FLAG_FIELDS)
 
-    product.save()
+# bulk_update skips model signals, so refresh cached catalog state once.
+bump_cache_version(CATALOG_CACHE_NAMESPACE)
+refresh_collections()
 
 print("🎉 Successfully updated all products with random promotional values!")
@@ -1,15 +1,20 @@
 from django.contrib import admin
 from django.utils.html import format_html
+
+from api.pagination import EstimatedCountPaginator
 from .models import Category, generate_unique_slug, Product, ProductImage
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['id', 'name', 'slug', 'image_preview']
+    list_select_related = ['image']
     list_filter = ['created_on', 'updated_on']
     search_fields = ['name', 'slug']
     readonly_fields = ['created_on', 'updated_on']
     exclude = ['slug']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     def image_preview(self, obj):
         if obj.image:
@@ -24,8 +29,12 @@ class ProductImageInline(admin.TabularInline):
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug', 'category', 'unit_price', 'stock', 'is_featured', 'is_product_of_the_day', 'is_best_seller', 'is_best_seller', 'is_active',]
     list_filter = ['is_active', 'is_featured', 'category']
+    list_select_related = ['category']
     search_fields = ['name', 'description']
     readonly_fields = ['created_at', 'updated_at']
+    autocomplete_fields = ['category']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     exclude = ['slug']
 
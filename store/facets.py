@@ -0,0 +1,76 @@
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from api.cache import CATALOG_CACHE_NAMESPACE, get_cache_version
+from .models import Category
+
+FACET_FLAGS = ('is_featured', 'is_flash_sale', 'is_product_of_the_day', 'is_best_seller', 'is_attractive_offer')
+
+# (min, max) unit price bounds of each price facet; min is inclusive, max exclusive.
+PRICE_BUCKETS = ((None, 500), (500, 1000), (1000, 2500), (2500, 5000), (5000, None))
+
+
+def _facet_key(name):
+    return f'{CATALOG_CACHE_NAMESPACE}:{get_cache_version(CATALOG_CACHE_NAMESPACE)}:facets:{name}'
+
+
+def facet_categories():
+    key = _facet_key('categories')
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.filter(is_active=True).values_list('id', 'slug', 'name'))
+        cache.set(key, categories, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return categories
+
+
+def price_bucket_filter(low, high):
+    condition = Q()
+    if low is not None:
+        condition &= Q(unit_price__gte=low)
+    if high is not None:
+        condition &= Q(unit_price__lt=high)
+    return condition
+
+
+def compute_facets(queryset):
+    """Category, flag, price and stock counts of ``queryset`` in a single aggregate query."""
+    categories = facet_categories()
+    aggregates = {
+        f'category_{index}': Count('pk', filter=Q(category_id=category_id))
+        for index, (category_id, _, _) in enumerate(categories)
+    }
+    aggregates.update({flag: Count('pk', filter=Q(**{flag: True})) for flag in FACET_FLAGS})
+    aggregates.update({
+        f'price_{index}': Count('pk', filter=price_bucket_filter(low, high))
+        for index, (low, high) in enumerate(PRICE_BUCKETS)
+    })
+    aggregates['in_stock'] = Count('pk', filter=Q(stock__gt=0))
+    counts = queryset.order_by().aggregate(**aggregates)
+
+    return {
+        'categories': [
+            {'slug': slug, 'name': name, 'count': counts[f'category_{index}']}
+            for index, (_, slug, name) in enumerate(categories)
+            if counts[f'category_{index}']
+        ],
+        'flags': {flag: counts[flag] for flag in FACET_FLAGS},
+        'price': [
+            {'min': low, 'max': high, 'count': counts[f'price_{index}']}
+            for index, (low, high) in enumerate(PRICE_BUCKETS)
+        ],
+        'in_stock': counts['in_stock'],
+    }
+
+
+def get_facets(queryset, params):
+    """Facets of ``queryset`` cached under the catalog version and its normalized filter ``params``."""
+    key = _facet_key(hashlib.md5(urlencode(params).encode()).hexdigest())
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, timeout=settings.CATALOG_CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,54 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from store.models import Product
+from store.serializers import ProductReadSerializer, ProductSerializer
+
+SERIALIZERS = (('ProductSerializer', ProductSerializer), ('ProductReadSerializer', ProductReadSerializer))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-product cost of serializing and rendering a catalog page with '
+        'ProductSerializer and the ProductReadSerializer fast path, and check their output matches.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=20, help='Products per rendered page.')
+        parser.add_argument('--rounds', type=int, default=200)
+
+    def handle(self, *args, **options):
+        products = list(Product.objects.catalog().filter(is_active=True).order_by('id')[:options['products']])
+        if not products:
+            raise CommandError('No products to render; run seed_data first.')
+        context = {'request': RequestFactory().get('/api/products/')}
+        renderer = JSONRenderer()
+
+        outputs, timings = {}, {}
+        for name, serializer_class in SERIALIZERS:
+            outputs[name] = renderer.render(serializer_class(products, many=True, context=context).data)
+            serialize, render = [], []
+            for _ in range(options['rounds']):
+                started = time.perf_counter()
+                data = serializer_class(products, many=True, context=context).data
+                serialized = time.perf_counter()
+                renderer.render(data)
+                serialize.append(serialized - started)
+                render.append(time.perf_counter() - started)
+            timings[name] = (statistics.median(serialize), statistics.median(render))
+
+        if len(set(outputs.values())) != 1:
+            raise CommandError('ProductReadSerializer output differs from ProductSerializer.')
+
+        baseline = timings['ProductSerializer']
+        self.stdout.write(f'{len(products)} products, median of {options["rounds"]} rounds, per product:')
+        for name, (serialize, render) in timings.items():
+            self.stdout.write(
+                f'  {name:<22} serialize {serialize / len(products) * 1e6:8.1f} us'
+                f'  serialize+render {render / len(products) * 1e6:8.1f} us'
+                f'  ({baseline[1] / render:.1f}x)'
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from store.renditions import RENDITION_MODELS, renditions_outdated
+from store.tasks import generate_image_renditions
+
+
+class Command(BaseCommand):
+    help = (
+        'Queue rendition generation for product and category images whose renditions are missing '
+        'or were built from another image, e.g. rows written by bulk imports.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sync', action='store_true', help='Generate in this process instead of queueing.')
+        parser.add_argument('--force', action='store_true', help='Regenerate current renditions as well.')
+
+    def handle(self, *args, **options):
+        for model_name, (model, field_name) in RENDITION_MODELS.items():
+            queued = 0
+            rows = model.objects.exclude(image=None).only('pk', 'image_id', field_name)
+            for instance in rows.iterator(chunk_size=2000):
+                if not options['force'] and not renditions_outdated(instance, field_name):
+                    continue
+                if options['sync']:
+                    generate_image_renditions(model_name, instance.pk)
+                else:
+                    generate_image_renditions.delay(model_name, instance.pk)
+                queued += 1
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {queued} rendition jobs.')
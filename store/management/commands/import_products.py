@@ -0,0 +1,262 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from filer.models import Image
+
+from api.cache import CATALOG_CACHE_NAMESPACE, bump_cache_version
+from cart.tasks import queue_cart_repricing
+from store.merchandising import refresh_collections
+from store.models import Category, Product, ProductImage, allocate_slug, make_base_slug, slug_candidates_filter
+
+PRODUCT_FIELDS = [
+    'name', 'description', 'preview', 'unit_price', 'stock', 'rating', 'is_active', 'is_featured',
+    'is_flash_sale', 'is_product_of_the_day', 'is_best_seller', 'is_attractive_offer',
+]
+BOOLEAN_FIELDS = {name for name in PRODUCT_FIELDS if name.startswith('is_')}
+TRUE_VALUES = {'1', 't', 'true', 'y', 'yes'}
+SLUG_MAX_LENGTH = Product._meta.get_field('slug').max_length
+
+
+class RowError(Exception):
+    pass
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as ex:
+            yield line_number, RowError(f'Invalid JSON: {ex}')
+            continue
+        if not isinstance(row, dict):
+            yield line_number, RowError('Each line must be a JSON object.')
+            continue
+        yield line_number, row
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream products from a CSV or JSONL file into the catalog in batches. '
+        'Rows need "name" and "category" (a category slug); rows whose "slug" matches an '
+        'existing product update it instead. "images" lists filer image ids '
+        '("|"-separated in CSV). Bad rows are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Input file, or "-" for stdin.')
+        parser.add_argument('--format', choices=sorted(READERS), help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--errors-file', help='Write rejected rows as JSON lines to this file.')
+
+    def handle(self, *args, **options):
+        input_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if input_format not in READERS:
+            raise CommandError('Cannot infer the input format; pass --format csv or --format jsonl.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        self.categories = dict(Category.objects.values_list('slug', 'id'))
+        self.allocated_slugs = set()
+        self.repriced_ids = set()
+        self.errors = []
+        totals = {'created': 0, 'updated': 0, 'failed': 0}
+        started = time.monotonic()
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            rows = READERS[input_format](stream)
+            batch_number = 0
+            while batch := list(islice(rows, options['batch_size'])):
+                batch_number += 1
+                batch_started = time.monotonic()
+                created, updated, failed = self.import_batch(batch)
+                totals['created'] += created
+                totals['updated'] += updated
+                totals['failed'] += failed
+                elapsed = time.monotonic() - batch_started
+                self.stdout.write(
+                    f'Batch {batch_number}: {created} created, {updated} updated, {failed} failed '
+                    f'({len(batch) / elapsed if elapsed else 0:.0f} rows/s)'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if totals['created'] or totals['updated']:
+            # bulk writes skip model signals, so refresh the derived catalog state once here.
+            bump_cache_version(CATALOG_CACHE_NAMESPACE)
+            refresh_collections()
+        if self.repriced_ids and not queue_cart_repricing(sorted(self.repriced_ids)):
+            self.stderr.write(self.style.WARNING(
+                f'Could not queue repricing of cart lines for {len(self.repriced_ids)} products; '
+                'the broker is unreachable.'
+            ))
+
+        self.report_errors(options['errors_file'])
+        elapsed = time.monotonic() - started
+        processed = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {processed} rows in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{totals['created']} created, {totals['updated']} updated, {totals['failed']} failed."
+        ))
+
+    def import_batch(self, batch):
+        rows = []
+        for line_number, row in batch:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                rows.append((line_number, self.clean_row(row)))
+            except (RowError, ValidationError) as ex:
+                self.add_error(line_number, ex)
+        failed = len(batch) - len(rows)
+
+        rows, image_failures = self.validate_images(rows)
+        failed += image_failures
+        existing = Product.objects.in_bulk([row['slug'] for _, row in rows if row.get('slug')], field_name='slug')
+        new_rows = [(line, row) for line, row in rows if row.get('slug') not in existing]
+        update_rows = [(line, row) for line, row in rows if row.get('slug') in existing]
+        self.assign_slugs(new_rows)
+
+        try:
+            with transaction.atomic():
+                self.write(new_rows, update_rows, existing)
+        except DatabaseError:
+            # Isolate the offending rows instead of dropping the whole batch.
+            created = updated = 0
+            rows = [(*item, True) for item in new_rows] + [(*item, False) for item in update_rows]
+            for line_number, row, is_new in rows:
+                try:
+                    with transaction.atomic():
+                        if is_new:
+                            self.write([(line_number, row)], [], existing)
+                        else:
+                            self.write([], [(line_number, row)], existing)
+                except DatabaseError as ex:
+                    self.add_error(line_number, ex)
+                    failed += 1
+                else:
+                    created += is_new
+                    updated += not is_new
+            return created, updated, failed
+        return len(new_rows), len(update_rows), failed
+
+    def clean_row(self, row):
+        name = str(row.get('name') or '').strip()
+        if not name:
+            raise RowError('"name" is required.')
+        category_id = self.categories.get(str(row.get('category') or '').strip())
+        if category_id is None:
+            raise RowError(f'Unknown category slug {row.get("category")!r}.')
+
+        values = {'name': name, 'category_id': category_id}
+        for field_name in PRODUCT_FIELDS[1:]:
+            value = row.get(field_name)
+            if value is None or value == '':
+                continue
+            if field_name in BOOLEAN_FIELDS and isinstance(value, str):
+                value = value.strip().lower() in TRUE_VALUES
+            values[field_name] = value
+
+        product = Product(**values)
+        product.full_clean(exclude=['slug', 'category'], validate_unique=False, validate_constraints=False)
+        cleaned = {field_name: getattr(product, field_name) for field_name in values}
+        images = row.get('images') or []
+        if isinstance(images, str):
+            images = [value for value in images.split('|') if value.strip()]
+        try:
+            images = [int(value) for value in images]
+        except (TypeError, ValueError):
+            raise RowError('"images" must be a list of filer image ids.')
+        return {'values': cleaned, 'slug': str(row.get('slug') or '').strip(), 'images': images}
+
+    def validate_images(self, rows):
+        image_ids = {image_id for _, row in rows for image_id in row['images']}
+        known = set(Image.objects.filter(pk__in=image_ids).values_list('pk', flat=True)) if image_ids else set()
+        valid, failed = [], 0
+        for line_number, row in rows:
+            missing = [image_id for image_id in row['images'] if image_id not in known]
+            if missing:
+                self.add_error(line_number, RowError(f'Unknown image ids {missing}.'))
+                failed += 1
+            else:
+                valid.append((line_number, row))
+        return valid, failed
+
+    def assign_slugs(self, rows):
+        base_slugs = {make_base_slug(row['values']['name'], SLUG_MAX_LENGTH) for _, row in rows}
+        if not base_slugs:
+            return
+        condition = Q()
+        for base_slug in base_slugs:
+            condition |= slug_candidates_filter(base_slug, 'slug', SLUG_MAX_LENGTH)
+        taken = set(Product.objects.filter(condition).values_list('slug', flat=True)) | self.allocated_slugs
+        for _, row in rows:
+            slug = allocate_slug(make_base_slug(row['values']['name'], SLUG_MAX_LENGTH), taken, SLUG_MAX_LENGTH)
+            taken.add(slug)
+            self.allocated_slugs.add(slug)
+            row['slug'] = slug
+
+    def write(self, new_rows, update_rows, existing):
+        products = [Product(slug=row['slug'], **row['values']) for _, row in new_rows]
+        Product.objects.bulk_create(products)
+        images = [
+            ProductImage(product=product, image_id=image_id)
+            for product, (_, row) in zip(products, new_rows)
+            for image_id in row['images']
+        ]
+
+        if update_rows:
+            now = timezone.now()
+            updated_products, update_fields = [], {'updated_at'}
+            for _, row in update_rows:
+                product = existing[row['slug']]
+                if 'unit_price' in row['values'] and row['values']['unit_price'] != product.unit_price:
+                    self.repriced_ids.add(str(product.pk))
+                for field_name, value in row['values'].items():
+                    setattr(product, field_name, value)
+                product.updated_at = now
+                update_fields.update(row['values'])
+                updated_products.append(product)
+            Product.objects.bulk_update(updated_products, sorted(update_fields))
+
+            replaced = [existing[row['slug']].pk for _, row in update_rows if row['images']]
+            if replaced:
+                ProductImage.objects.filter(product_id__in=replaced).delete()
+            images += [
+                ProductImage(product=existing[row['slug']], image_id=image_id)
+                for _, row in update_rows
+                for image_id in row['images']
+            ]
+
+        ProductImage.objects.bulk_create(images)
+
+    def add_error(self, line_number, error):
+        messages = error.messages if isinstance(error, ValidationError) else [str(error)]
+        self.errors.append({'line': line_number, 'errors': messages})
+        self.stderr.write(f'Line {line_number}: {"; ".join(messages)}')
+
+    def report_errors(self, errors_file):
+        if errors_file and self.errors:
+            with open(errors_file, 'w', encoding='utf-8') as output:
+                for error in self.errors:
+                    output.write(json.dumps(error) + '\n')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from store.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Reinstall the product full-text index and repopulate it from the product table.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.install(connection)
+        backend.rebuild(connection)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt product search index with {type(backend).__name__}.'))
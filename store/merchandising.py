@@ -0,0 +1,141 @@
+import uuid
+
+from django.core.cache import cache
+
+from api.pagination import ProductCursorPagination
+from .models import Product
+
+# Collection name -> the Product flag that puts a product in it.
+COLLECTIONS = {
+    'flash-sales': 'is_flash_sale',
+    'product-of-the-day': 'is_product_of_the_day',
+    'best-sellers': 'is_best_seller',
+    'attractive-offers': 'is_attractive_offer',
+}
+
+# Share of products the seeding scripts put in each collection.
+PROMO_FLAG_WEIGHTS = {
+    'is_featured': 0.30,
+    'is_flash_sale': 0.10,
+    'is_product_of_the_day': 0.05,
+    'is_best_seller': 0.15,
+    'is_attractive_offer': 0.20,
+}
+
+# Same order as cursor pagination so both modes list a collection identically.
+COLLECTION_ORDERING = ProductCursorPagination.ordering
+
+# Ids pushed per RPUSH while building a collection list.
+COLLECTION_CHUNK_SIZE = 1000
+
+
+def random_promo_flags(rng):
+    """Weighted random promo flags with at least one of them set."""
+    flags = {flag: rng.random() < weight for flag, weight in PROMO_FLAG_WEIGHTS.items()}
+    if not any(flags.values()):
+        flags[rng.choice(list(flags))] = True
+    return flags
+
+
+def collection_queryset(name):
+    return Product.objects.filter(is_active=True, **{COLLECTIONS[name]: True})
+
+
+def _collection_key(name):
+    return f'collection:{name}:ids'
+
+
+def _redis_client():
+    """The raw client behind the default cache, or None when it is not django_redis."""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+    except (ImportError, NotImplementedError):
+        return None
+
+
+class CollectionIds:
+    """Ids of a collection stored as a Redis list; slices read only their page with LRANGE."""
+
+    def __init__(self, client, key, count):
+        self.client, self.key, self._count = client, key, count
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1 or None][0]
+        start, stop, step = index.indices(self._count)
+        if stop <= start:
+            return []
+        ids = [uuid.UUID(pk.decode()) for pk in self.client.lrange(self.key, start, stop - 1)]
+        return ids[::step]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+def build_collection(name):
+    """Recompute the ordered id list of a collection from its partial index and store it.
+
+    On Redis the list is staged under a temporary key and renamed into place
+    together with its length, which readers compare with LLEN to detect a
+    partly evicted collection.
+    """
+    ids = list(collection_queryset(name).order_by(*COLLECTION_ORDERING).values_list('id', flat=True))
+    client = _redis_client()
+    if client is None:
+        cache.set(_collection_key(name), ids, timeout=None)
+        return ids
+    key = cache.make_key(_collection_key(name))
+    staging = f'{key}:{uuid.uuid4().hex}'
+    pipeline = client.pipeline(transaction=False)
+    for start in range(0, len(ids), COLLECTION_CHUNK_SIZE):
+        pipeline.rpush(staging, *map(str, ids[start:start + COLLECTION_CHUNK_SIZE]))
+    pipeline.expire(staging, 60)  # so a build that dies before the rename leaves nothing behind
+    pipeline.execute()
+    pipeline = client.pipeline()
+    if ids:
+        pipeline.rename(staging, key)
+        pipeline.persist(key)
+    else:
+        pipeline.delete(key)
+    pipeline.set(f'{key}:count', len(ids))
+    pipeline.execute()
+    return CollectionIds(client, key, len(ids))
+
+
+def get_collection_ids(name):
+    """The collection's ordered ids, as a list or, on Redis, a lazily paged ``CollectionIds``."""
+    client = _redis_client()
+    if client is None:
+        ids = cache.get(_collection_key(name))
+        if ids is None:
+            ids = build_collection(name)
+        return ids
+    key = cache.make_key(_collection_key(name))
+    pipeline = client.pipeline(transaction=False)
+    count, length = pipeline.get(f'{key}:count').llen(key).execute()
+    if count is None or int(count) != length:
+        return build_collection(name)
+    return CollectionIds(client, key, length)
+
+
+def refresh_collections(names=None):
+    for name in names or COLLECTIONS:
+        build_collection(name)
+
+
+def affected_collections(product, created=False, deleted=False):
+    """Collections whose membership may change by saving or deleting ``product``."""
+    if created or deleted:
+        return {name for name, flag in COLLECTIONS.items() if getattr(product, flag)}
+    changed = product.changed_fields(['is_active', *COLLECTIONS.values()])
+    return {
+        name for name, flag in COLLECTIONS.items()
+        if flag in changed or ('is_active' in changed and getattr(product, flag))
+    }
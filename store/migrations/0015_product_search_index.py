@@ -0,0 +1,97 @@
+from django.db import migrations
+
+# The SQL is frozen here rather than imported from store.search, which tracks the current models.
+# On SQLite the FTS5 index is keyed on store_product_search, whose INTEGER PRIMARY KEY survives
+# VACUUM, rather than on the implicit rowid of the UUID-keyed store_product.
+
+POSTGRES_INSTALL = [
+    """
+    ALTER TABLE store_product ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS product_search_vector_idx ON store_product USING gin (search_vector)',
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS product_search_vector_idx',
+    'ALTER TABLE store_product DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE TABLE IF NOT EXISTS store_product_search (
+        id INTEGER PRIMARY KEY, product_id char(32) NOT NULL UNIQUE, name TEXT, description TEXT
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS store_product_fts USING fts5(
+        name, description, content='store_product_search', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS store_product_search_insert AFTER INSERT ON store_product BEGIN
+        INSERT INTO store_product_search(product_id, name, description)
+        VALUES (new.id, new.name, new.description);
+        INSERT INTO store_product_fts(rowid, name, description)
+        SELECT id, name, description FROM store_product_search WHERE product_id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS store_product_search_delete AFTER DELETE ON store_product BEGIN
+        INSERT INTO store_product_fts(store_product_fts, rowid, name, description)
+        SELECT 'delete', id, name, description FROM store_product_search WHERE product_id = old.id;
+        DELETE FROM store_product_search WHERE product_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS store_product_search_update AFTER UPDATE OF name, description ON store_product
+    BEGIN
+        INSERT INTO store_product_fts(store_product_fts, rowid, name, description)
+        SELECT 'delete', id, name, description FROM store_product_search WHERE product_id = old.id;
+        UPDATE store_product_search SET name = new.name, description = new.description
+        WHERE product_id = new.id;
+        INSERT INTO store_product_fts(rowid, name, description)
+        SELECT id, name, description FROM store_product_search WHERE product_id = new.id;
+    END
+    """,
+    """
+    INSERT INTO store_product_search(product_id, name, description)
+    SELECT id, name, description FROM store_product
+    """,
+    "INSERT INTO store_product_fts(store_product_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS store_product_search_insert',
+    'DROP TRIGGER IF EXISTS store_product_search_delete',
+    'DROP TRIGGER IF EXISTS store_product_search_update',
+    'DROP TABLE IF EXISTS store_product_fts',
+    'DROP TABLE IF EXISTS store_product_search',
+]
+
+VENDOR_SQL = {
+    'postgresql': (POSTGRES_INSTALL, POSTGRES_UNINSTALL),
+    'sqlite': (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def run_vendor_sql(index):
+    def run(apps, schema_editor):
+        statements = VENDOR_SQL.get(schema_editor.connection.vendor, ([], []))[index]
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_product_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_vendor_sql(0), run_vendor_sql(1)),
+    ]
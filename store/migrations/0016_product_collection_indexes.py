@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_product_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_flash_sale', True)), fields=['created_at', 'id'], name='product_flash_sale_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_product_of_the_day', True)), fields=['created_at', 'id'], name='product_of_the_day_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_best_seller', True)), fields=['created_at', 'id'], name='product_best_seller_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_attractive_offer', True)), fields=['created_at', 'id'], name='product_attractive_offer_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
 from django.utils.text import slugify
 from filer.fields.image import FilerImageField
 from django.contrib.auth import get_user_model
@@ -6,44 +8,123 @@ import uuid
 
 User = get_user_model()
 
-def generate_unique_slug(instance, field_name='name', slug_field='slug', max_length=120):
-    base_value = getattr(instance, field_name, '') or 'item'
-    base_slug = slugify(base_value)[:max_length] or 'item'
+# Room for a "-<counter>" suffix of up to ten digits.
+SLUG_SUFFIX_RESERVE = 11
+SLUG_SAVE_ATTEMPTS = 3
+
+
+def make_base_slug(value, max_length):
+    return slugify(value or 'item')[:max_length] or 'item'
+
+
+def slug_candidates_filter(base_slug, slug_field, max_length):
+    """Match every slug ``allocate_slug`` could produce for ``base_slug``."""
+    stem = base_slug[:max_length - SLUG_SUFFIX_RESERVE]
+    if stem == base_slug:
+        return models.Q(**{f'{slug_field}__regex': rf'^{re.escape(base_slug)}(-[0-9]+)?$'})
+    return models.Q(**{f'{slug_field}__startswith': stem})
+
+
+def allocate_slug(base_slug, taken, max_length):
+    """First of ``base``, ``base-1``, ``base-2``... (truncated to fit) that is not in ``taken``."""
     slug = base_slug
     counter = 1
-
-    ModelClass = instance.__class__
-    while ModelClass.objects.filter(**{slug_field: slug}).exclude(pk=instance.pk).exists():
+    while slug in taken:
         suffix = f"-{counter}"
         slug = base_slug[:max_length - len(suffix)] + suffix
         counter += 1
-
     return slug
 
 
-class Category(models.Model):
+def generate_unique_slug(instance, field_name='name', slug_field='slug', max_length=120):
+    base_slug = make_base_slug(getattr(instance, field_name, ''), max_length)
+    ModelClass = instance.__class__
+    taken = set(
+        ModelClass.objects.filter(slug_candidates_filter(base_slug, slug_field, max_length))
+        .exclude(pk=instance.pk)
+        .values_list(slug_field, flat=True)
+    )
+    return allocate_slug(base_slug, taken, max_length)
+
+
+class ChangeTrackingMixin:
+    """Remember the field values an instance was loaded or last saved with."""
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def changed_fields(self, field_names):
+        """Subset of ``field_names`` whose value differs from what was loaded (all of them if unsaved)."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return set(field_names)
+        return {
+            name for name in field_names
+            if loaded.get(name, models.DEFERRED) is models.DEFERRED or loaded[name] != getattr(self, name)
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+
+class UniqueSlugMixin(ChangeTrackingMixin):
+    """Derive ``slug`` from ``slug_source_field`` whenever that field changes.
+
+    Allocation costs one query; a concurrent save that takes the same slug is
+    caught by the unique constraint and retried with a fresh allocation.
+    """
+    slug_source_field = 'name'
+    slug_max_length = 120
+
+    def save(self, *args, **kwargs):
+        if self.slug and not self.changed_fields([self.slug_source_field]):
+            return super().save(*args, **kwargs)
+
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            self.slug = generate_unique_slug(self, self.slug_source_field, 'slug', self.slug_max_length)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                slug_taken = type(self).objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if not slug_taken or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
+
+
+class ProductQuerySet(models.QuerySet):
+    def catalog(self):
+        """Load everything ProductSerializer renders in a fixed number of queries."""
+        return self.select_related('category', 'category__image').prefetch_related(
+            models.Prefetch('images', queryset=ProductImage.objects.select_related('image'))
+        )
+
+
+class Category(UniqueSlugMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=100)
     slug = models.SlugField(max_length=120, unique=True, db_index=True)
     image = FilerImageField(null=True, blank=True, on_delete=models.SET_NULL, related_name='category_images')
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     is_active = models.BooleanField(default=True)
     created_on = models.DateTimeField(auto_now_add=True)
     updated_on = models.DateTimeField(auto_now=True)
 
+    slug_max_length = 120
+
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
 
-    def save(self, *args, **kwargs):
-        self.slug = generate_unique_slug(self, field_name='name', slug_field='slug', max_length=120)
-        super().save(*args, **kwargs)
-
     def __str__(self):
         return self.name
 
 
-class Product(models.Model):
+class Product(UniqueSlugMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
@@ -66,9 +147,22 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        self.slug = generate_unique_slug(self, field_name='name', slug_field='slug', max_length=255)
-        super().save(*args, **kwargs)
+    objects = ProductQuerySet.as_manager()
+
+    slug_max_length = 255
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_created_at_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='product_flash_sale_idx',
+                         condition=models.Q(is_active=True, is_flash_sale=True)),
+            models.Index(fields=['created_at', 'id'], name='product_of_the_day_idx',
+                         condition=models.Q(is_active=True, is_product_of_the_day=True)),
+            models.Index(fields=['created_at', 'id'], name='product_best_seller_idx',
+                         condition=models.Q(is_active=True, is_best_seller=True)),
+            models.Index(fields=['created_at', 'id'], name='product_attractive_offer_idx',
+                         condition=models.Q(is_active=True, is_attractive_offer=True)),
+        ]
 
     def __str__(self):
         return self.name
@@ -78,6 +172,7 @@ class ProductImage(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     product = models.ForeignKey(Product, related_name='images', on_delete=models.CASCADE)
     image = FilerImageField(null=True, blank=True, on_delete=models.SET_NULL, related_name='product_images')
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def save(self, *arge, **kwargs):
         self.alt_text = f'{self.product.name} image'
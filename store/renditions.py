@@ -0,0 +1,41 @@
+from easy_thumbnails.alias import aliases
+
+from .models import Category, ProductImage
+
+# Thumbnail aliases (see THUMBNAIL_ALIASES) generated for every catalog image, smallest first.
+RENDITION_ALIASES = ('list', 'detail', 'zoom')
+
+# Model name -> (model, JSON field holding the renditions of its ``image``).
+RENDITION_MODELS = {
+    'productimage': (ProductImage, 'renditions'),
+    'category': (Category, 'image_renditions'),
+}
+
+
+def build_renditions(image):
+    """Generate the rendition files of a filer image and describe them.
+
+    The result records the source image id so renditions left over from a
+    previous image are never served.
+    """
+    if image is None:
+        return {}
+    thumbnailer = image.easy_thumbnails_thumbnailer
+    renditions = {'source': image.pk}
+    for alias in RENDITION_ALIASES:
+        options = {**aliases.get(alias), 'subject_location': image.subject_location}
+        thumbnail = thumbnailer.get_thumbnail(options)
+        renditions[alias] = {'url': thumbnail.url, 'width': thumbnail.width, 'height': thumbnail.height}
+    return renditions
+
+
+def current_renditions(instance, field_name):
+    """The stored renditions if they were built from the instance's current image."""
+    renditions = getattr(instance, field_name)
+    if instance.image_id is None or not renditions or renditions.get('source') != instance.image_id:
+        return None
+    return renditions
+
+
+def renditions_outdated(instance, field_name):
+    return (getattr(instance, field_name) or {}).get('source') != instance.image_id
@@ -0,0 +1,209 @@
+import re
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Product
+
+TABLE = Product._meta.db_table
+
+
+class BaseSearchBackend:
+    """Filter a product queryset by a free-text query and order it by relevance.
+
+    Backends annotate ``search_rank`` (higher is more relevant) so callers can
+    paginate the result like any other queryset.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def install(self, connection):
+        """Create the database objects backing the index; ``rebuild`` populates them."""
+
+    def uninstall(self, connection):
+        """Drop the database objects created by ``install``."""
+
+    def rebuild(self, connection):
+        """Repopulate the index from the product table."""
+
+
+class BasicSearchBackend(BaseSearchBackend):
+    """``icontains`` matching for databases without a full-text engine."""
+
+    def search(self, queryset, query):
+        condition = Q()
+        for term in query.split():
+            condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        return queryset.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).order_by('-search_rank', 'id')
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted ``tsvector`` generated column with a GIN index, ranked with ``ts_rank``."""
+    config = 'english'
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        vector = RawSQL(f'"{TABLE}"."search_vector"', [], output_field=SearchVectorField())
+        search_query = SearchQuery(query, config=self.config, search_type='websearch')
+        return queryset.alias(search_vector=vector).filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(vector, search_query)
+        ).order_by('-search_rank', 'id')
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('{self.config}', coalesce(name, '')), 'A') ||
+                    setweight(to_tsvector('{self.config}', coalesce(description, '')), 'B')
+                ) STORED
+            """)
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS product_search_vector_idx ON {TABLE} USING gin (search_vector)'
+            )
+
+    def uninstall(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX IF EXISTS product_search_vector_idx')
+            cursor.execute(f'ALTER TABLE {TABLE} DROP COLUMN IF EXISTS search_vector')
+
+
+class SqliteSearchBackend(BaseSearchBackend):
+    """FTS5 index over a copy of the searchable columns, kept in sync by triggers.
+
+    The FTS5 external content is ``search_table``, whose ``INTEGER PRIMARY KEY``
+    survives VACUUM, unlike the implicit rowid of the UUID-keyed product table;
+    it maps each index row to its ``product_id``. Rebuilding the product table
+    (e.g. a migration that alters one of its columns) drops the triggers, so
+    ``install_missing_triggers`` puts them back after every ``migrate``.
+    """
+    search_table = f'{TABLE}_search'
+    fts_table = f'{TABLE}_fts'
+    triggers = tuple(f'{TABLE}_search_{suffix}' for suffix in ('insert', 'delete', 'update'))
+
+    def to_match_expression(self, query):
+        return ' '.join(f'"{term}"*' for term in re.findall(r'\w+', query))
+
+    def search(self, queryset, query):
+        expression = self.to_match_expression(query)
+        if not expression:
+            return queryset.none()
+        matches = RawSQL(
+            f'SELECT product_id FROM {self.search_table} WHERE id IN '
+            f'(SELECT rowid FROM {self.fts_table} WHERE {self.fts_table} MATCH %s)',
+            (expression,),
+        )
+        rank = RawSQL(
+            f'SELECT -bm25({self.fts_table}, 10.0, 1.0) FROM {self.fts_table} '
+            f'WHERE {self.fts_table} MATCH %s AND {self.fts_table}.rowid = '
+            f'(SELECT id FROM {self.search_table} WHERE product_id = "{TABLE}"."id")',
+            (expression,),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(search_rank=rank).order_by('-search_rank', 'id')
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.search_table} (
+                    id INTEGER PRIMARY KEY, product_id char(32) NOT NULL UNIQUE, name TEXT, description TEXT
+                )
+            """)
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {self.fts_table} USING fts5(
+                    name, description, content='{self.search_table}', content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            """)
+        self.install_triggers(connection)
+
+    def install_triggers(self, connection):
+        insert, delete, update = self.triggers
+        remove_indexed = f"""
+            INSERT INTO {self.fts_table}({self.fts_table}, rowid, name, description)
+            SELECT 'delete', id, name, description FROM {self.search_table} WHERE product_id = old.id;
+        """
+        add_indexed = f"""
+            INSERT INTO {self.fts_table}(rowid, name, description)
+            SELECT id, name, description FROM {self.search_table} WHERE product_id = new.id;
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {insert} AFTER INSERT ON {TABLE} BEGIN
+                    INSERT INTO {self.search_table}(product_id, name, description)
+                    VALUES (new.id, new.name, new.description);
+                    {add_indexed}
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {delete} AFTER DELETE ON {TABLE} BEGIN
+                    {remove_indexed}
+                    DELETE FROM {self.search_table} WHERE product_id = old.id;
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {update} AFTER UPDATE OF name, description ON {TABLE} BEGIN
+                    {remove_indexed}
+                    UPDATE {self.search_table} SET name = new.name, description = new.description
+                    WHERE product_id = new.id;
+                    {add_indexed}
+                END
+            """)
+
+    def install_missing_triggers(self, connection):
+        """Reinstall dropped triggers and resync the index; return whether any were missing."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s", [self.search_table])
+            if cursor.fetchone() is None:
+                return False
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", self.triggers
+            )
+            if cursor.fetchone()[0] == len(self.triggers):
+                return False
+        self.install_triggers(connection)
+        self.rebuild(connection)
+        return True
+
+    def uninstall(self, connection):
+        with connection.cursor() as cursor:
+            for trigger in self.triggers:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.fts_table}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.search_table}')
+
+    def rebuild(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.search_table}')
+            cursor.execute(
+                f'INSERT INTO {self.search_table}(product_id, name, description) '
+                f'SELECT id, name, description FROM {TABLE}'
+            )
+            cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')")
+
+
+VENDOR_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SqliteSearchBackend,
+}
+
+
+def get_search_backend(using=connection):
+    backend_path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+    if backend_path:
+        return import_string(backend_path)()
+    return VENDOR_BACKENDS.get(using.vendor, BasicSearchBackend)()
+
+
+def install_missing_search_triggers(sender, using, **kwargs):
+    """``post_migrate`` receiver restoring the SQLite index triggers a table rebuild dropped."""
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        SqliteSearchBackend().install_missing_triggers(connection)
@@ -1,29 +1,63 @@
+from api.fieldsets import SparseFieldsetMixin
 from api.utils import get_image_url
 from .models import ProductImage, Product, Category
+from .renditions import RENDITION_ALIASES, current_renditions
 from rest_framework import serializers
 
+def image_url(value, request=None):
+    if not value or not hasattr(value, 'url'):
+        return None
+    if request:
+        return request.build_absolute_uri(value.url)
+    return value.url
+
+
+def rendition_urls(instance, renditions_field, request=None):
+    """Rendition URLs of an instance's ``image`` plus a ``srcset``; None until they are generated."""
+    renditions = current_renditions(instance, renditions_field)
+    if renditions is None:
+        return None
+    representation, srcset = {}, {}
+    for alias in RENDITION_ALIASES:
+        url = renditions[alias]['url']
+        if request:
+            url = request.build_absolute_uri(url)
+        representation[alias] = url
+        srcset.setdefault(renditions[alias]['width'], url)
+    representation['srcset'] = ', '.join(f'{url} {width}w' for width, url in srcset.items())
+    return representation
+
+
 class ImageURLField(serializers.Field):
     def to_representation(self, value):
-        if not value or not hasattr(value, 'url'):
-            return None
-        request = self.context.get('request')
-        if request:
-            return request.build_absolute_uri(value.url)
-        return value.url
+        return image_url(value, self.context.get('request'))
+
 
-class SimpleCategorySerializer(serializers.ModelSerializer):
+class RenditionsField(serializers.Field):
+    def __init__(self, renditions_field, **kwargs):
+        self.renditions_field = renditions_field
+        self.source_fields = (renditions_field, 'image')
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return rendition_urls(instance, self.renditions_field, self.context.get('request'))
+
+class SimpleCategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     image = ImageURLField()
+    image_renditions = RenditionsField('image_renditions')
     class Meta:
         model = Category
-        fields = ['id', 'name', 'slug', 'image']
+        fields = ['id', 'name', 'slug', 'image', 'image_renditions']
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    class ProductImageSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class ProductImageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
         image = ImageURLField()
+        renditions = RenditionsField('renditions')
         class Meta:
             model = ProductImage
-            fields = ['image',]
+            fields = ['image', 'renditions']
 
     category = SimpleCategorySerializer(read_only=True)
     images = ProductImageSerializer(many=True, read_only=True)
@@ -48,13 +82,58 @@ class ProductSerializer(serializers.ModelSerializer):
             'images'
         ]
 
-class CategorySerializer(serializers.ModelSerializer):
+class ProductReadSerializer(serializers.BaseSerializer):
+    """Read-only fast path for ``ProductSerializer`` on list and retrieve.
+
+    Builds the representation directly from a ``Product.objects.catalog()``
+    instance instead of going through a bound field per attribute. The output
+    must stay identical to ``ProductSerializer``.
+    """
+    unit_price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    def to_representation(self, product):
+        request = self.context.get('request')
+        category = product.category
+        return {
+            'id': str(product.id),
+            'name': product.name,
+            'slug': product.slug,
+            'preview': product.preview,
+            'description': product.description,
+            'unit_price': self.unit_price_field.to_representation(product.unit_price),
+            'stock': product.stock,
+            'is_featured': product.is_featured,
+            'is_flash_sale': product.is_flash_sale,
+            'is_product_of_the_day': product.is_product_of_the_day,
+            'is_best_seller': product.is_best_seller,
+            'is_attractive_offer': product.is_attractive_offer,
+            'rating': float(product.rating),
+            'category': {
+                'id': str(category.id),
+                'name': category.name,
+                'slug': category.slug,
+                'image': image_url(category.image, request),
+                'image_renditions': rendition_urls(category, 'image_renditions', request),
+            },
+            'images': [
+                {
+                    'image': image_url(product_image.image, request),
+                    'renditions': rendition_urls(product_image, 'renditions', request),
+                }
+                for product_image in product.images.all()
+            ],
+        }
+
+
+class CategorySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     image = ImageURLField()
+    image_renditions = RenditionsField('image_renditions')
     class Meta:
         model = Category
         fields = [
             'id',
             'name',
             'slug',
-            'image'
+            'image',
+            'image_renditions'
         ]
\ No newline at end of file
@@ -0,0 +1,64 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from kombu.exceptions import OperationalError
+
+from api.cache import CATALOG_CACHE_NAMESPACE, bump_cache_version
+from .merchandising import affected_collections, refresh_collections
+from .models import Category, Product, ProductImage
+from .renditions import RENDITION_MODELS, renditions_outdated
+from .tasks import generate_image_renditions, rebuild_collections
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def bump_catalog_version(sender, **kwargs):
+    transaction.on_commit(lambda: bump_cache_version(CATALOG_CACHE_NAMESPACE))
+
+
+@receiver(post_save, sender=Product)
+def refresh_product_collections(sender, instance, created, **kwargs):
+    names = affected_collections(instance, created=created)
+    if names:
+        transaction.on_commit(lambda: queue_collection_rebuild(names))
+
+
+@receiver(post_delete, sender=Product)
+def refresh_deleted_product_collections(sender, instance, **kwargs):
+    names = affected_collections(instance, deleted=True)
+    if names:
+        transaction.on_commit(lambda: queue_collection_rebuild(names))
+
+
+def queue_collection_rebuild(names):
+    # Rebuilding a collection reads its whole partial index, so keep it out of the request.
+    try:
+        rebuild_collections.delay(sorted(names))
+    except OperationalError:
+        logger.exception('Could not queue the rebuild of collections %s; rebuilding them inline', sorted(names))
+        refresh_collections(names)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+def schedule_image_renditions(sender, instance, **kwargs):
+    model_name = sender._meta.model_name
+    if renditions_outdated(instance, RENDITION_MODELS[model_name][1]):
+        transaction.on_commit(lambda: queue_image_renditions(model_name, instance.pk))
+
+
+def queue_image_renditions(model_name, pk):
+    # The save has committed by now; a broker outage must not turn it into a 500.
+    # The original image keeps being served, and generate_renditions catches up later.
+    try:
+        generate_image_renditions.delay(model_name, pk)
+    except OperationalError:
+        logger.exception('Could not queue renditions of %s %s', model_name, pk)
@@ -0,0 +1,23 @@
+from celery import shared_task
+
+from api.cache import CATALOG_CACHE_NAMESPACE, bump_cache_version
+from .merchandising import refresh_collections
+from .renditions import RENDITION_MODELS, build_renditions
+
+
+@shared_task
+def generate_image_renditions(model_name, pk):
+    model, field_name = RENDITION_MODELS[model_name]
+    instance = model.objects.select_related('image').filter(pk=pk).first()
+    if instance is None:
+        return
+    renditions = build_renditions(instance.image)
+    # Only store them if the image was not swapped while they were generated.
+    updated = model.objects.filter(pk=pk, image_id=instance.image_id).update(**{field_name: renditions})
+    if updated:
+        bump_cache_version(CATALOG_CACHE_NAMESPACE)
+
+
+@shared_task
+def rebuild_collections(names):
+    refresh_collections(names)
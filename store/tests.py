@@ -1,3 +1,754 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from filer.models import Image
+from kombu.exceptions import OperationalError
+from PIL import Image as PILImage
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.cache import CATALOG_CACHE_NAMESPACE, bump_cache_version
+from api.management.commands.benchmark_api import summarize
+from api.models import City, Region
+from api.pagination import EstimatedCountPaginator, estimate_row_count
+from api.views import LocationsApiView
+from cart.models import Cart, CartItem
+from .merchandising import COLLECTION_ORDERING, CollectionIds, _collection_key, get_collection_ids
+from .models import Category, Product, ProductImage, generate_unique_slug
+from .search import SqliteSearchBackend, install_missing_search_triggers
+from .serializers import ProductReadSerializer, ProductSerializer
+from .tasks import generate_image_renditions, rebuild_collections
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'state': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'state'},
+}
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_filer_image(name='image.png', size=(8, 8)):
+    buffer = io.BytesIO()
+    PILImage.new('RGB', size, 'red').save(buffer, format='PNG')
+    upload = SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+    return Image.objects.create(original_filename=name, file=upload)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, MEDIA_ROOT=MEDIA_ROOT)
+class CatalogTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch('store.tasks.generate_image_renditions.delay')
+        self.queue_renditions = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('cart.tasks.reprice_cart_items.delay')
+        self.queue_repricing = patcher.start()
+        self.addCleanup(patcher.stop)
+        # Collection rebuilds run as soon as they are queued, as a worker would.
+        patcher = mock.patch('store.tasks.rebuild_collections.delay', side_effect=rebuild_collections)
+        self.queue_collections = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @classmethod
+    def create_products(cls, count, category=None, images=2, **fields):
+        category = category or Category.objects.create(name='Lipstick', image=make_filer_image())
+        products = []
+        for index in range(count):
+            product = Product.objects.create(
+                category=category, name=f'Product {index}', unit_price='12.50', stock=10, **fields
+            )
+            for _ in range(images):
+                ProductImage.objects.create(product=product, image=make_filer_image())
+            products.append(product)
+        return products
+
+
+class ProductQueryCountTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_products(20, is_flash_sale=True, is_best_seller=True)
+
+    def count_queries(self, url, page_size):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), page_size)
+        return len(context.captured_queries)
+
+    def assertConstantQueries(self, url):
+        self.client.get(url, {'page_size': 1})  # build lazily cached state such as collection ids
+        self.assertEqual(self.count_queries(url, 2), self.count_queries(url, 20))
+
+    def test_product_list_queries_do_not_grow_with_page_size(self):
+        self.assertConstantQueries(reverse('products-list'))
+
+    def test_promo_list_queries_do_not_grow_with_page_size(self):
+        self.assertConstantQueries(reverse('flash-sales'))
+        self.assertConstantQueries(reverse('best-sellers'))
+
+    def test_product_detail_query_count(self):
+        product = Product.objects.first()
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('products-detail', args=[product.slug]))
+        self.assertEqual(len(response.data['images']), 2)
+        self.assertIsNotNone(response.data['category']['image'])
+
+
+class CatalogResponseCacheTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = cls.create_products(3, images=1, is_flash_sale=True)[0]
+
+    def test_repeated_request_is_served_without_queries(self):
+        url = reverse('products-list')
+        self.assertEqual(self.client.get(url, {'search': 'Product'})['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'search': ' product ', 'utm_source': 'mail'})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 3)
+
+    def test_product_save_invalidates_cached_responses(self):
+        url = reverse('flash-sales')
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Renamed'
+            self.product.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('Renamed', [item['name'] for item in response.data['results']])
+
+    def test_image_delete_invalidates_cached_detail(self):
+        url = reverse('products-detail', args=[self.product.slug])
+        self.assertEqual(len(self.client.get(url).data['images']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.images.all().delete()
+        self.assertEqual(self.client.get(url).data['images'], [])
+
+
+class ConditionalGetTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = cls.create_products(2, images=1, is_best_seller=True)[0]
+
+    def test_matching_etag_is_answered_with_304_without_queries(self):
+        for url in (reverse('products-list'), reverse('categories-list'), reverse('best-sellers'),
+                    reverse('products-detail', args=[self.product.slug])):
+            response = self.client.get(url)
+            self.assertTrue(response['ETag'].startswith('"'))
+            self.assertIn('Last-Modified', response)
+            with self.assertNumQueries(0):
+                not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(not_modified.status_code, 304)
+            self.assertEqual(not_modified['ETag'], response['ETag'])
+            self.assertEqual(not_modified.content, b'')
+
+    def test_changes_produce_a_new_etag(self):
+        url = reverse('products-list')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'page_size': 1})['ETag'], etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Renamed'
+            self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_is_honoured(self):
+        url = reverse('categories-list')
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE='Mon, 01 Jan 2001 00:00:00 GMT')
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_modified_is_withheld_within_the_second_of_a_change(self):
+        url = reverse('categories-list')
+        now = time.time()
+        with mock.patch('api.cache.time.time', return_value=now):
+            bump_cache_version(CATALOG_CACHE_NAMESPACE)
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(now + 5))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        with mock.patch('api.cache.time.time', return_value=now + 1):
+            response = self.client.get(url)
+        self.assertEqual(response['Last-Modified'], http_date(int(now)))
+
+    def test_locations_support_conditional_requests(self):
+        region = Region.objects.create(name='Bagmati')
+        City.objects.create(name='Kathmandu', region=region)
+        view = LocationsApiView.as_view()
+        factory = APIRequestFactory()
+        response = view(factory.get('/api/locations/', {'region': region.id}))
+        self.assertEqual([city['name'] for city in response.data], ['Kathmandu'])
+        with self.assertNumQueries(0):
+            response = view(factory.get('/api/locations/', {'region': region.id}, HTTP_IF_NONE_MATCH=response['ETag']))
+        self.assertEqual(response.status_code, 304)
+
+
+class ProductReadSerializerTests(CatalogTestCase):
+    def render(self, serializer_class, products):
+        request = RequestFactory().get('/api/products/')
+        return JSONRenderer().render(serializer_class(products, many=True, context={'request': request}).data)
+
+    def test_output_is_byte_identical_to_product_serializer(self):
+        products = self.create_products(2, images=2, is_best_seller=True, preview='https://example.com/p')
+        self.create_products(1, category=Category.objects.create(name='Blank'), images=0, description=None)
+        product_image = products[0].images.first()
+        generate_image_renditions('productimage', product_image.pk)
+        generate_image_renditions('category', products[0].category_id)
+        products = list(Product.objects.catalog().order_by('id'))
+        self.assertEqual(self.render(ProductReadSerializer, products), self.render(ProductSerializer, products))
+
+    def test_views_output_is_unchanged(self):
+        product = self.create_products(1)[0]
+        response = self.client.get(reverse('products-detail', args=[product.slug]))
+        expected = ProductSerializer(Product.objects.catalog().get(pk=product.pk), context={'request': response.wsgi_request})
+        self.assertEqual(response.json(), json.loads(JSONRenderer().render(expected.data)))
+
+    def test_benchmark_command_reports_both_serializers(self):
+        self.create_products(3)
+        stdout = io.StringIO()
+        call_command('benchmark_serializers', rounds=2, stdout=stdout)
+        self.assertIn('ProductReadSerializer', stdout.getvalue())
+
+
+class SparseFieldsetTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_products(3, is_flash_sale=True)
+
+    def test_fields_limit_the_output_and_the_selected_columns(self):
+        grid_fields = ['id', 'name', 'slug', 'preview', 'unit_price', 'rating']
+        for url in (reverse('products-list'), reverse('flash-sales')):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, {'fields': ','.join(grid_fields), 'pagination': 'cursor'})
+            self.assertEqual([list(item) for item in response.data['results']], [grid_fields] * 3)
+            sql = [query['sql'] for query in queries if query['sql'].startswith('SELECT "store_product"."id"')]
+            self.assertEqual(len(sql), 1)
+            self.assertNotIn('description', sql[0])
+            self.assertNotIn('store_category', sql[0])
+            self.assertFalse(any('store_productimage' in query['sql'] for query in queries))
+
+    def test_nested_paths_and_omit(self):
+        response = self.client.get(reverse('products-list'), {'fields': 'name,category.slug,images'})
+        item = response.data['results'][0]
+        self.assertEqual(list(item), ['name', 'category', 'images'])
+        self.assertEqual(list(item['category']), ['slug'])
+        self.assertEqual(len(item['images']), 2)
+
+        response = self.client.get(reverse('products-list'), {'omit': 'description,images,category.image_renditions'})
+        item = response.data['results'][0]
+        self.assertNotIn('description', item)
+        self.assertNotIn('images', item)
+        self.assertEqual(list(item['category']), ['id', 'name', 'slug', 'image'])
+
+    def test_sparse_and_full_responses_are_cached_separately(self):
+        url = reverse('products-list')
+        self.assertIn('description', self.client.get(url).data['results'][0])
+        response = self.client.get(url, {'fields': 'name'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(list(response.data['results'][0]), ['name'])
+
+
+class ProductFacetTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        lipstick = Category.objects.create(name='Lipstick')
+        serum = Category.objects.create(name='Serum')
+        cheap, mid = cls.create_products(2, category=lipstick, images=0, is_flash_sale=True)
+        pricey = cls.create_products(1, category=serum, images=0, is_best_seller=True)[0]
+        for product, price, rating, stock in ((cheap, 300, 4.5, 0), (mid, 800, 3.0, 5), (pricey, 6000, 4.8, 2)):
+            Product.objects.filter(pk=product.pk).update(unit_price=price, rating=rating, stock=stock)
+
+    def names(self, **params):
+        response = self.client.get(reverse('products-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item['name'] for item in response.data['results'])
+
+    def test_filters(self):
+        self.assertEqual(len(self.names(min_price=500)), 2)
+        self.assertEqual(len(self.names(min_price=500, max_price=1000)), 1)
+        self.assertEqual(len(self.names(min_rating=4.5)), 2)
+        self.assertEqual(len(self.names(in_stock='true')), 2)
+        self.assertEqual(len(self.names(in_stock='false')), 1)
+        self.assertEqual(len(self.names(is_flash_sale='true', category='lipstick')), 2)
+        self.assertEqual(len(self.names(is_best_seller='true', min_price=7000)), 0)
+
+    def test_category_case_is_part_of_the_cache_key(self):
+        self.assertEqual(len(self.names(category='lipstick')), 2)
+        self.assertEqual(len(self.names(category='Lipstick')), 0)
+
+    def test_facets_are_counted_in_one_aggregate_query(self):
+        url = reverse('products-list')
+        with CaptureQueriesContext(connection) as queries:
+            facets = self.client.get(url, {'in_stock': 'true'}).data['facets']
+        self.assertEqual(sum('"in_stock"' in query['sql'] for query in queries), 1)
+        self.assertEqual(facets['categories'], [
+            {'slug': 'lipstick', 'name': 'Lipstick', 'count': 1},
+            {'slug': 'serum', 'name': 'Serum', 'count': 1},
+        ])
+        self.assertEqual(facets['flags']['is_flash_sale'], 1)
+        self.assertEqual(facets['flags']['is_best_seller'], 1)
+        self.assertEqual([bucket['count'] for bucket in facets['price']], [0, 1, 0, 0, 1])
+        self.assertEqual(facets['in_stock'], 2)
+
+    def test_facets_are_cached_per_filter_combination(self):
+        url = reverse('products-list')
+        self.client.get(url, {'min_rating': 4, 'page_size': 1})
+        with CaptureQueriesContext(connection) as queries:
+            facets = self.client.get(url, {'min_rating': 4, 'page_size': 2}).data['facets']
+        self.assertFalse(any('"in_stock"' in query['sql'] for query in queries))
+        self.assertEqual(facets['in_stock'], 1)
+        self.assertEqual(self.client.get(url, {'min_rating': 1}).data['facets']['in_stock'], 2)
+
+
+class CursorPaginationTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_products(5, images=0, is_best_seller=True)
+
+    def collect_pages(self, url, **params):
+        names, response = [], self.client.get(url, params)
+        while True:
+            self.assertNotIn('count', response.data)
+            names += [item['name'] for item in response.data['results']]
+            if not response.data['next']:
+                return names
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_mode_walks_every_product_once(self):
+        names = self.collect_pages(reverse('products-list'), pagination='cursor', page_size=2)
+        self.assertEqual(sorted(names), sorted(Product.objects.values_list('name', flat=True)))
+
+    def test_cursor_mode_skips_count_query(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('best-sellers'), {'pagination': 'cursor'})
+        self.assertFalse(any('COUNT(' in query['sql'] for query in context.captured_queries))
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse('best-sellers'), {'page_number': 2, 'page_size': 2})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class ProductSearchTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Makeup')
+        Product.objects.create(category=category, name='Matte Lipstick', description='Long wear colour')
+        Product.objects.create(category=category, name='Lip Balm', description='Pairs with any lipstick')
+        Product.objects.create(category=category, name='Mascara', description='Volumising')
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('products-list'), {'search': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['name'] for item in response.data['results']]
+
+    def test_results_are_ordered_by_relevance(self):
+        self.assertEqual(self.search('lipstick'), ['Matte Lipstick', 'Lip Balm'])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('lipstick matte'), ['Matte Lipstick'])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_index_follows_product_save(self):
+        product = Product.objects.get(name='Mascara')
+        product.description = 'Goes with lipstick'
+        product.save()
+        self.assertIn('Mascara', self.search('lipstick'))
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+        self.assertNotIn('Mascara', self.search('lipstick'))
+
+    def test_triggers_dropped_by_a_table_rebuild_are_restored_after_migrate(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite FTS5 index only')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {SqliteSearchBackend.triggers[-1]}')
+        install_missing_search_triggers(sender=None, using=connection.alias)
+        Product.objects.filter(name='Mascara').update(name='Lipstick Mascara')
+        self.assertIn('Lipstick Mascara', self.search('lipstick'))
+
+    def test_search_pages_by_number_even_in_cursor_mode(self):
+        response = self.client.get(reverse('products-list'), {'search': 'lipstick', 'pagination': 'cursor'})
+        self.assertEqual(response.data['count'], 2)
+
+
+class MerchandisingCollectionTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.flash_sales = cls.create_products(3, images=1, is_flash_sale=True)
+        cls.create_products(2, images=1, is_best_seller=True)
+
+    def test_collection_page_is_one_pk_in_fetch(self):
+        get_collection_ids('flash-sales')
+        # Products by primary key plus the image prefetch; no COUNT(*) or flag scan.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('flash-sales'), {'page_size': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [str(pk) for pk in get_collection_ids('flash-sales')[:2]],
+        )
+
+    def test_flag_change_refreshes_only_affected_collections(self):
+        product = Product.objects.get(pk=self.flash_sales[0].pk)
+        best_sellers = get_collection_ids('best-sellers')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            product.is_flash_sale = False
+            product.is_best_seller = True
+            product.save()
+        self.assertNotIn(product.pk, get_collection_ids('flash-sales'))
+        self.assertEqual(len(get_collection_ids('best-sellers')), len(best_sellers) + 1)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            product.name = 'Only the name changed'
+            product.save()
+        self.assertEqual(len(callbacks), 1)  # the catalog version bump only
+
+    def test_deactivated_product_leaves_its_collections(self):
+        product = Product.objects.get(pk=self.flash_sales[1].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.is_active = False
+            product.save()
+        self.assertNotIn(product.pk, get_collection_ids('flash-sales'))
+        self.assertEqual(self.client.get(reverse('flash-sales')).data['count'], 2)
+
+    def test_products_hidden_behind_the_lists_back_are_not_served(self):
+        get_collection_ids('flash-sales')
+        Product.objects.filter(pk=self.flash_sales[0].pk).update(is_active=False)
+        Product.objects.filter(pk=self.flash_sales[1].pk).update(is_flash_sale=False)
+        response = self.client.get(reverse('flash-sales'))
+        self.assertEqual([item['id'] for item in response.data['results']], [str(self.flash_sales[2].pk)])
+
+    def test_rebuilds_are_queued_and_survive_a_broker_outage(self):
+        product = Product.objects.get(pk=self.flash_sales[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.is_best_seller = True
+            product.save()
+        self.queue_collections.assert_called_once_with(['best-sellers'])
+
+        self.queue_collections.side_effect = OperationalError('broker unreachable')
+        with self.assertLogs('store.signals', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            product.is_flash_sale = False
+            product.save()
+        self.assertNotIn(product.pk, get_collection_ids('flash-sales'))
+
+    def test_cursor_mode_lists_the_same_order(self):
+        response = self.client.get(reverse('flash-sales'), {'pagination': 'cursor'})
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [str(pk) for pk in get_collection_ids('flash-sales')],
+        )
+
+
+class RedisCollectionTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.flash_sales = cls.create_products(3, images=0, is_flash_sale=True)
+
+    def setUp(self):
+        super().setUp()
+        url = os.environ.get('REDIS_CACHE_URL', 'redis://127.0.0.1:6379/1')
+        settings_override = override_settings(CACHES={**LOCMEM_CACHES, 'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': url,
+            'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.5, 'SOCKET_TIMEOUT': 0.5},
+        }})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        from django_redis import get_redis_connection
+        from redis.exceptions import RedisError
+        self.redis = get_redis_connection('default')
+        try:
+            self.redis.ping()
+        except RedisError:
+            self.skipTest(f'Redis is not reachable at {url}')
+        self.key = cache.make_key(_collection_key('flash-sales'))
+        keys = (self.key, f'{self.key}:count')
+        self.redis.delete(*keys)
+        self.addCleanup(self.redis.delete, *keys)
+
+    def test_pages_are_read_from_a_redis_list(self):
+        ids = get_collection_ids('flash-sales')
+        self.assertIsInstance(ids, CollectionIds)
+        expected = list(
+            Product.objects.filter(is_flash_sale=True).order_by(*COLLECTION_ORDERING).values_list('id', flat=True)
+        )
+        self.assertEqual(list(ids), expected)
+        self.assertEqual(ids[1:3], expected[1:3])
+        self.assertEqual(ids.count(), 3)
+        self.assertEqual(self.client.get(reverse('flash-sales'), {'page_size': 2}).data['count'], 3)
+
+    def test_a_partly_evicted_list_is_rebuilt(self):
+        get_collection_ids('flash-sales')
+        self.redis.delete(self.key)
+        self.assertEqual(len(get_collection_ids('flash-sales')), 3)
+
+
+class SlugAllocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Skin Care')
+
+    def create(self, name):
+        return Product.objects.create(category=self.category, name=name)
+
+    def test_next_free_suffix_costs_one_query(self):
+        for _ in range(5):
+            self.create('Rose Water')
+        self.create('Rose Water Toner')
+        product = Product(category=self.category, name='Rose Water')
+        with self.assertNumQueries(1):
+            self.assertEqual(generate_unique_slug(product, max_length=255), 'rose-water-5')
+
+    def test_slug_follows_name_changes_only(self):
+        product = self.create('Face Mask')
+        self.create('Face Mask')
+        product.stock = 3
+        with self.assertNumQueries(1):
+            product.save()
+        self.assertEqual(product.slug, 'face-mask')
+        product.name = 'Sheet Mask'
+        product.save()
+        self.assertEqual(product.slug, 'sheet-mask')
+
+    def test_long_names_are_truncated_to_fit_the_suffix(self):
+        name = 'x' * 130
+        slugs = [Category.objects.create(name=name[:100]).slug for _ in range(3)]
+        self.assertEqual(slugs, ['x' * 100, 'x' * 100 + '-1', 'x' * 100 + '-2'])
+        long_slugs = [self.create(name * 2).slug for _ in range(2)]
+        self.assertEqual(long_slugs, ['x' * 255, 'x' * 253 + '-1'])
+
+    def test_concurrently_taken_slug_is_retried(self):
+        product = Product(category=self.category, name='Night Cream')
+        self.create('Night Cream')
+        original = generate_unique_slug
+        calls = []
+
+        def racing_generate(instance, *args, **kwargs):
+            # The first allocation returns a slug another writer has already inserted.
+            calls.append(instance)
+            return 'night-cream' if len(calls) == 1 else original(instance, *args, **kwargs)
+
+        with mock.patch('store.models.generate_unique_slug', racing_generate):
+            product.save()
+        self.assertEqual(product.slug, 'night-cream-1')
+        self.assertEqual(len(calls), 2)
+
+
+class ImportProductsCommandTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Hair Care')
+        cls.image = make_filer_image()
+        cls.existing = Product.objects.create(category=cls.category, name='Argan Oil', unit_price='10.00')
+
+    def run_import(self, filename, content, *args):
+        path = os.path.join(MEDIA_ROOT, filename)
+        with open(path, 'w', encoding='utf-8') as output:
+            output.write(content)
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('import_products', path, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv_rows_are_created_in_batches_with_unique_slugs(self):
+        content = (
+            'name,category,unit_price,stock,is_flash_sale,images\n'
+            f'Argan Oil,hair-care,12.00,5,yes,{self.image.pk}\n'
+            'Argan Oil,hair-care,13.00,5,no,\n'
+            'Shampoo,hair-care,4.50,20,true,\n'
+        )
+        with CaptureQueriesContext(connection) as context:
+            stdout, _ = self.run_import('products.csv', content, '--batch-size', '2')
+        self.assertIn('3 created, 0 updated, 0 failed', stdout)
+        self.assertEqual(
+            sorted(Product.objects.filter(name='Argan Oil').values_list('slug', flat=True)),
+            ['argan-oil', 'argan-oil-1', 'argan-oil-2'],
+        )
+        self.assertEqual(ProductImage.objects.get().image_id, self.image.pk)
+        self.assertEqual(get_collection_ids('flash-sales'), list(
+            Product.objects.filter(is_flash_sale=True).order_by('-created_at', '-id').values_list('id', flat=True)
+        ))
+        self.assertLess(len(context.captured_queries), 25)
+
+    def test_bad_rows_are_reported_without_aborting(self):
+        errors_file = os.path.join(MEDIA_ROOT, 'errors.jsonl')
+        content = '\n'.join([
+            json.dumps({'name': 'Conditioner', 'category': 'hair-care', 'unit_price': '6.00'}),
+            json.dumps({'name': 'Ghost', 'category': 'missing'}),
+            json.dumps({'name': 'Negative', 'category': 'hair-care', 'stock': -1}),
+            '{not json',
+            json.dumps({'name': 'No image', 'category': 'hair-care', 'images': [999999]}),
+        ])
+        stdout, stderr = self.run_import('products.jsonl', content, '--errors-file', errors_file)
+        self.assertIn('1 created, 0 updated, 4 failed', stdout)
+        self.assertIn("Unknown category slug 'missing'", stderr)
+        with open(errors_file, encoding='utf-8') as errors:
+            self.assertEqual([json.loads(line)['line'] for line in errors], [2, 3, 4, 5])
+        self.assertTrue(Product.objects.filter(name='Conditioner').exists())
+
+    def test_rows_matching_an_existing_slug_update_it(self):
+        content = json.dumps({
+            'slug': 'argan-oil', 'name': 'Argan Oil', 'category': 'hair-care', 'unit_price': '15.00',
+            'images': [self.image.pk],
+        })
+        stdout, _ = self.run_import('update.jsonl', content)
+        self.assertIn('0 created, 1 updated', stdout)
+        self.existing.refresh_from_db()
+        self.assertEqual(str(self.existing.unit_price), '15.00')
+        self.assertEqual(list(self.existing.images.values_list('image_id', flat=True)), [self.image.pk])
+        self.queue_repricing.assert_called_once_with([str(self.existing.pk)])
+
+    def test_broker_outage_is_reported_after_the_import(self):
+        self.queue_repricing.side_effect = OperationalError('broker unreachable')
+        content = json.dumps({'slug': 'argan-oil', 'name': 'Argan Oil', 'category': 'hair-care', 'unit_price': '20.00'})
+        with self.assertLogs('cart.tasks', 'ERROR'):
+            stdout, stderr = self.run_import('update.jsonl', content)
+        self.assertIn('0 created, 1 updated', stdout)
+        self.assertIn('Could not queue repricing of cart lines for 1 products', stderr)
+
+
+class SeedDataCommandTests(CatalogTestCase):
+    def seed(self, **options):
+        options = {'seed': 7, 'categories': 3, 'products': 12, 'image_pool': 2, 'users': 4, 'carts': 2,
+                   'batch_size': 5, **options}
+        call_command('seed_data', stdout=io.StringIO(), **options)
+        return list(Product.objects.order_by('id').values_list('id', 'name', 'unit_price', 'is_flash_sale'))
+
+    def test_same_seed_generates_the_same_rows_idempotently(self):
+        first = self.seed()
+        self.assertEqual(len(first), 12)
+        self.assertEqual(self.seed(), first)
+        self.assertEqual(ProductImage.objects.count(), 24)
+        self.assertEqual(Category.objects.count(), 3)
+
+    def test_growing_the_scale_only_adds_rows(self):
+        small = self.seed(products=6)
+        large = self.seed(products=12)
+        self.assertTrue(set(small) <= set(large))
+        self.assertEqual(len(large), 12)
+
+    def test_users_and_carts_are_generated(self):
+        self.seed()
+        user_model = get_user_model()
+        self.assertEqual(user_model.objects.filter(is_verified=True).count(), 4)
+        self.assertEqual(Cart.objects.count(), 2)
+        self.assertTrue(CartItem.objects.exists())
+        for item in CartItem.objects.select_related('product'):
+            self.assertEqual(item.unit_price, item.product.unit_price)
+
+
+class BenchmarkSupportTests(CatalogTestCase):
+    @override_settings(MIDDLEWARE=['api.middleware.QueryCountMiddleware'])
+    def test_query_count_header_matches_the_queries_run(self):
+        self.create_products(3)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('products-list'))
+        self.assertEqual(response['X-SQL-Queries'], str(len(queries)))
+
+    def test_latency_summary_uses_nearest_rank_percentiles(self):
+        samples = [{'status': 200, 'latency': n / 1000, 'queries': 4} for n in range(1, 101)]
+        samples[-1]['status'] = 500
+        summary = summarize(samples, wall_time=2)
+        self.assertEqual(summary['latency_ms'], {'p50': 50.0, 'p95': 95.0, 'p99': 99.0})
+        self.assertEqual(summary['requests_per_second'], 50.0)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['sql_queries_per_request'], 4)
+
+
+class ImageRenditionTests(CatalogTestCase):
+    def test_saving_an_image_queues_its_renditions_once(self):
+        product = self.create_products(1, images=0)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            product_image = ProductImage.objects.create(product=product, image=make_filer_image())
+        self.queue_renditions.assert_called_once_with('productimage', product_image.pk)
+
+        generate_image_renditions('productimage', product_image.pk)
+        self.queue_renditions.reset_mock()
+        product_image.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            product_image.save()
+        self.queue_renditions.assert_not_called()
+
+    def test_broker_outage_is_logged_not_raised(self):
+        self.queue_renditions.side_effect = OperationalError('broker unreachable')
+        product = self.create_products(1, images=0)[0]
+        with self.assertLogs('store.signals', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+            ProductImage.objects.create(product=product, image=make_filer_image())
+
+    def test_renditions_are_webp_and_exposed_as_srcset(self):
+        category = Category.objects.create(name='Blush', image=make_filer_image(size=(1000, 600)))
+        product = self.create_products(1, category=category, images=0)[0]
+        product_image = ProductImage.objects.create(product=product, image=make_filer_image(size=(1000, 600)))
+        generate_image_renditions('productimage', product_image.pk)
+        generate_image_renditions('category', category.pk)
+
+        response = self.client.get(reverse('products-detail', args=[product.slug]))
+        renditions = response.data['images'][0]['renditions']
+        self.assertTrue(all(renditions[alias].endswith('.webp') for alias in ('list', 'detail', 'zoom')))
+        self.assertEqual(renditions['srcset'], f"{renditions['list']} 320w, {renditions['detail']} 800w, "
+                                               f"{renditions['zoom']} 1000w")
+        self.assertTrue(renditions['list'].startswith('http://testserver/'))
+        self.assertIsNotNone(response.data['category']['image_renditions'])
+
+    def test_renditions_of_a_replaced_image_are_not_served(self):
+        product = self.create_products(1, images=1)[0]
+        product_image = product.images.get()
+        generate_image_renditions('productimage', product_image.pk)
+        product_image.refresh_from_db()
+        product_image.image = make_filer_image()
+        product_image.save()
+
+        response = self.client.get(reverse('products-detail', args=[product.slug]))
+        self.assertIsNone(response.data['images'][0]['renditions'])
+        self.assertIsNotNone(response.data['images'][0]['image'])
+
+
+class AdminChangelistTests(CatalogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = get_user_model().objects.create_superuser(email='admin@example.com', password='Secret@123')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_the_page(self):
+        for model in ('product', 'category'):
+            url = reverse(f'admin:store_{model}_changelist')
+            self.create_products(2, images=0)
+            few = self.changelist_queries(url)
+            for _ in range(3):
+                self.create_products(2, images=0)
+            self.assertEqual(self.changelist_queries(url), few, model)
+
+    def test_estimated_count_falls_back_to_count_without_statistics(self):
+        self.create_products(3, images=0)
+        paginator = EstimatedCountPaginator(Product.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        if connection.vendor != 'postgresql':
+            self.assertIsNone(estimate_row_count(Product))
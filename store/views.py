@@ -1,33 +1,76 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiParameter
-from rest_framework.filters import SearchFilter
 from rest_framework.viewsets import ModelViewSet
-from api.filters import ProductCategoryFilter
-from api.pagination import ProductResultsPagination
+from api.cache import CachedResponseMixin, normalize_query_params
+from api.fieldsets import FIELDSET_PARAMETERS, SparseFieldsetViewMixin, has_fieldset
+from api.filters import ProductFilter, ProductSearchFilter
+from api.pagination import ProductResultsPagination, SelectablePaginationMixin, CURSOR_PAGINATION_PARAMETERS
+from .facets import get_facets
+from .merchandising import collection_queryset, get_collection_ids
 from .models import Product, Category
-from .serializers import ProductSerializer, CategorySerializer
+from .serializers import ProductSerializer, CategorySerializer, ProductReadSerializer
 from rest_framework.generics import ListAPIView
 
 
+class ReadSerializerMixin:
+    """Render reads with ``read_serializer_class`` while the schema keeps documenting ``serializer_class``.
+
+    Sparse fieldset requests keep ``serializer_class``, which knows how to trim its output.
+    """
+    read_serializer_class = None
+
+    def get_serializer_class(self):
+        request = getattr(self, 'request', None)
+        if (self.read_serializer_class is not None and request is not None and request.method in ('GET', 'HEAD')
+                and not has_fieldset(request) and not getattr(self, 'swagger_fake_view', False)):
+            return self.read_serializer_class
+        return super().get_serializer_class()
+
+
 @extend_schema_view(
     list=extend_schema(
         auth=[],
         tags=['Products'],
+        parameters=CURSOR_PAGINATION_PARAMETERS + FIELDSET_PARAMETERS,
     ),
     retrieve=extend_schema(
         auth=[],
         tags=['Products'],
+        parameters=FIELDSET_PARAMETERS,
     )
 )
-class ProductViewSet(ModelViewSet):
+class ProductViewSet(CachedResponseMixin, SelectablePaginationMixin, SparseFieldsetViewMixin, ReadSerializerMixin,
+                     ModelViewSet):
     http_method_names = ['get']
-    queryset = Product.objects.filter(is_active=True).order_by('id')
+    queryset = Product.objects.catalog().filter(is_active=True).order_by('id')
     serializer_class = ProductSerializer
+    read_serializer_class = ProductReadSerializer
     lookup_field = 'slug'
-    filter_backends = [DjangoFilterBackend, SearchFilter]
-    filterset_class = ProductCategoryFilter
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter]
+    filterset_class = ProductFilter
     search_fields = ['name', 'description']
     pagination_class = ProductResultsPagination
+    fieldset_required_fields = ('created_at',)  # read by cursor pagination
+    facet_query_params = (*ProductFilter.base_filters, 'search')
+    cache_query_params = tuple(dict.fromkeys((*CachedResponseMixin.cache_query_params, *facet_query_params)))
+
+    def get_queryset(self):
+        return self.trim_to_fieldset(super().get_queryset())
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        params = normalize_query_params(
+            self.request.query_params, self.facet_query_params, self.cache_case_insensitive_params
+        )
+        response.data['facets'] = get_facets(self.filter_queryset(self.get_queryset()), params)
+        return response
+
+    def get_pagination_mode(self):
+        # Relevance order has no keyset to seek on, so searches always page by number.
+        request = getattr(self, 'request', None)
+        if request is not None and request.query_params.get('search'):
+            return 'page'
+        return super().get_pagination_mode()
 
 
 @extend_schema_view(
@@ -40,36 +83,55 @@ class ProductViewSet(ModelViewSet):
         tags=['Category'],
     )
 )
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, ModelViewSet):
     http_method_names = ['get']
-    queryset = Category.objects.filter(is_active=True)
+    queryset = Category.objects.select_related('image').filter(is_active=True)
     serializer_class = CategorySerializer
     lookup_field = 'slug'
 
 
-@extend_schema(tags=["Products"], auth=[],)
-class FlashSalesListView(ListAPIView):
-    queryset = Product.objects.filter(is_active=True, is_flash_sale=True)
-    serializer_class = ProductSerializer
-    pagination_class = ProductResultsPagination
+class CollectionListView(SelectablePaginationMixin, SparseFieldsetViewMixin, ReadSerializerMixin, ListAPIView):
+    """List a merchandising collection from its precomputed id list.
 
-@extend_schema(tags=["Products"], auth=[],)
-class ProductOfTheDayListView(ListAPIView):
-    queryset = Product.objects.filter(is_active=True, is_product_of_the_day=True)
+    Page-number requests slice the cached ids and fetch only that page with one
+    ``pk__in`` query; cursor requests fall back to the collection's partial index.
+    """
     serializer_class = ProductSerializer
+    read_serializer_class = ProductReadSerializer
     pagination_class = ProductResultsPagination
+    collection = None
+    fieldset_required_fields = ('created_at',)  # read by cursor pagination
 
+    def get_queryset(self):
+        return self.trim_to_fieldset(collection_queryset(self.collection).catalog())
 
-@extend_schema(tags=["Products"], auth=[],)
-class BestSellerListView(ListAPIView):
-    queryset = Product.objects.filter(is_active=True, is_best_seller=True)
-    serializer_class = ProductSerializer
-    pagination_class = ProductResultsPagination
+    def list(self, request, *args, **kwargs):
+        if self.get_pagination_mode() == 'cursor':
+            return super().list(request, *args, **kwargs)
+        page_ids = self.paginate_queryset(get_collection_ids(self.collection))
+        # The id list only orders the page: fetching through the collection's filters keeps
+        # products deactivated or unflagged behind the list's back (e.g. by .update()) out of it.
+        products = self.get_queryset().in_bulk(page_ids)
+        page = [products[pk] for pk in page_ids if pk in products]
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-@extend_schema(tags=["Products"], auth=[],)
-class AttractiveOfferListView(ListAPIView):
-    queryset = Product.objects.filter(is_active=True, is_attractive_offer=True)
-    serializer_class = ProductSerializer
-    pagination_class = ProductResultsPagination
+@extend_schema(tags=["Products"], auth=[], parameters=CURSOR_PAGINATION_PARAMETERS + FIELDSET_PARAMETERS)
+class FlashSalesListView(CachedResponseMixin, CollectionListView):
+    collection = 'flash-sales'
+
+
+@extend_schema(tags=["Products"], auth=[], parameters=CURSOR_PAGINATION_PARAMETERS + FIELDSET_PARAMETERS)
+class ProductOfTheDayListView(CachedResponseMixin, CollectionListView):
+    collection = 'product-of-the-day'
+
+
+@extend_schema(tags=["Products"], auth=[], parameters=CURSOR_PAGINATION_PARAMETERS + FIELDSET_PARAMETERS)
+class BestSellerListView(CachedResponseMixin, CollectionListView):
+    collection = 'best-sellers'
+
 
+@extend_schema(tags=["Products"], auth=[], parameters=CURSOR_PAGINATION_PARAMETERS + FIELDSET_PARAMETERS)
+class AttractiveOfferListView(CachedResponseMixin, CollectionListView):
+    collection = 'attractive-offers'